@@ -0,0 +1,131 @@
+"""
+Accuracy/latency report for the int8 ArcFace model against fp32.
+
+Usage (from the backend directory):
+    python benchmarks/arcface_int8_report.py --images DIR [--threshold 0.95]
+
+DIR holds one sub-directory per person:
+    DIR/alice/1.jpg, DIR/alice/2.jpg, DIR/bob/1.jpg, ...
+
+Faces are detected and aligned once, then embedded by both models. The
+report shows forward-pass latency, how far int8 embeddings drift from fp32,
+and genuine/impostor distance distributions with false accept/reject rates
+at the current FACE_MATCH_THRESHOLD, so the threshold can be kept or moved.
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "main.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+import numpy as np  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+from services.face_engines import OnnxArcFaceEngine  # noqa: E402
+from services.face_matching import equal_error_threshold, pair_distances  # noqa: E402
+from services.face_recognition import (  # noqa: E402
+    _decode_image_bgr,
+    _normalize_embedding,
+    get_detector_cascade,
+)
+
+IMAGE_PATTERNS = ("*.jpg", "*.jpeg", "*.png")
+
+
+def _labelled_images(directory):
+    labels, images = [], []
+    for person in sorted(os.listdir(directory)):
+        person_dir = os.path.join(directory, person)
+        if not os.path.isdir(person_dir):
+            continue
+        for pattern in IMAGE_PATTERNS:
+            for path in sorted(glob.glob(os.path.join(glob.escape(person_dir), pattern))):
+                with open(path, "rb") as f:
+                    image = _decode_image_bgr(f.read())
+                if image is not None:
+                    labels.append(person)
+                    images.append(image)
+    return labels, images
+
+
+def _timed_forward(engine, faces, rounds):
+    engine.forward(faces[:1])
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        embeddings = engine.forward(faces)
+        timings.append((time.perf_counter() - started) * 1000 / len(faces))
+    return embeddings, float(np.median(timings))
+
+
+def _rates(genuine, impostor, threshold):
+    frr = float(np.mean(genuine > threshold)) if genuine.size else 0.0
+    far = float(np.mean(impostor <= threshold)) if impostor.size else 0.0
+    return far, frr
+
+
+def _describe(values):
+    if not values.size:
+        return "n/a"
+    p5, p50, p95 = np.percentile(values, [5, 50, 95])
+    return f"p5 {p5:.3f}  p50 {p50:.3f}  p95 {p95:.3f}"
+
+
+def main():
+    from college.views.attendance import FACE_MATCH_THRESHOLD
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", required=True)
+    parser.add_argument("--fp32", default=str(settings.FACE_ONNX_MODEL_PATH))
+    parser.add_argument("--int8", default=str(settings.FACE_ONNX_INT8_MODEL_PATH))
+    parser.add_argument("--threshold", type=float, default=FACE_MATCH_THRESHOLD)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    cascade = get_detector_cascade()
+    fp32 = OnnxArcFaceEngine(cascade, model_path=args.fp32)
+    int8 = OnnxArcFaceEngine(cascade, model_path=args.int8)
+
+    labels, images = _labelled_images(args.images)
+    faces, owners = fp32.align_batch(images)
+    if faces is None:
+        sys.exit(f"No faces found in {args.images}")
+    labels = [labels[index] for index in owners]
+    print(f"{len(labels)} faces of {len(set(labels))} people ({len(images) - len(labels)} images without a face)")
+
+    results = {}
+    for name, engine in (("fp32", fp32), ("int8", int8)):
+        raw, ms_per_face = _timed_forward(engine, faces, args.rounds)
+        embeddings = np.stack([_normalize_embedding(np.asarray(e, dtype=np.float32)) for e in raw])
+        results[name] = (embeddings, ms_per_face)
+
+    fp32_embeddings, fp32_ms = results["fp32"]
+    int8_embeddings, int8_ms = results["int8"]
+
+    drift = np.linalg.norm(fp32_embeddings - int8_embeddings, axis=1)
+    print(f"\nlatency  fp32 {fp32_ms:.2f} ms/face  int8 {int8_ms:.2f} ms/face  speedup x{fp32_ms / int8_ms:.2f}")
+    print(f"fp32->int8 drift (L2, same face)  {_describe(drift)}  max {drift.max():.3f}")
+
+    print(f"\n{'model':>5} {'genuine distances':>32} {'impostor distances':>32} {'FAR':>7} {'FRR':>7} {'EER thr':>8}")
+    for name, (embeddings, _) in results.items():
+        genuine, impostor = pair_distances(embeddings, labels)
+        far, frr = _rates(genuine, impostor, args.threshold)
+        eer = equal_error_threshold(genuine, impostor)
+        eer = eer[0] if eer else float("nan")
+        print(
+            f"{name:>5} {_describe(genuine):>32} {_describe(impostor):>32} "
+            f"{far:>7.3f} {frr:>7.3f} {eer:>8.3f}"
+        )
+    print(f"\nFAR/FRR at threshold {args.threshold}")
+
+
+if __name__ == "__main__":
+    main()
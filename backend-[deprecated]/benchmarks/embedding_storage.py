@@ -0,0 +1,169 @@
+"""
+Size and accuracy of half-precision embedding storage on the enrolled
+population.
+
+Usage (from the backend directory, against the real database):
+    python benchmarks/embedding_storage.py [--queries 500] [--noise 0.05]
+        [--float32-index]
+
+Reports:
+  - on-disk size of the half-precision HNSW index that search uses; with
+    --float32-index, also the size a float32 HNSW index would have. That
+    index is built inside a transaction that is rolled back, and blocks
+    writes to the face table while it builds.
+  - roster cache memory for every batch, float32 vs float16
+  - match drift: every query is an enrolled embedding plus Gaussian noise
+    (a re-captured face). Top-1 agreement and distance error are measured
+    for float16 vs float32 over the whole population in memory, and for
+    closest_faces() (half-precision index + full-precision rescoring) vs
+    an exact full-precision scan on a sample in Postgres.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "main.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+import numpy as np  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from pgvector.django import L2Distance  # noqa: E402
+
+from college.models import FaceEmbedding  # noqa: E402
+from college.utils.face_search import closest_faces, matchable_faces  # noqa: E402
+from services.face_matching import distance_matrix  # noqa: E402
+
+HALF_INDEX = "face_embedding_half_hnsw"
+FLOAT32_INDEX = "bench_face_embedding_hnsw"
+
+
+def _index_size(cursor, name):
+    cursor.execute("SELECT pg_relation_size(to_regclass(%s))", [name])
+    row = cursor.fetchone()
+    return row[0] if row and row[0] is not None else None
+
+
+def _index_sizes(float32_index):
+    with connection.cursor() as cursor:
+        sizes = {HALF_INDEX: _index_size(cursor, HALF_INDEX)}
+    if not float32_index:
+        return sizes
+
+    # Built only to be measured: the transaction is rolled back.
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE INDEX {FLOAT32_INDEX} ON {FaceEmbedding._meta.db_table}"
+            " USING hnsw (embedding vector_l2_ops) WITH (m = 16, ef_construction = 64)"
+            " WHERE embedding IS NOT NULL"
+        )
+        sizes[f"{FLOAT32_INDEX} (float32, rolled back)"] = _index_size(cursor, FLOAT32_INDEX)
+        transaction.set_rollback(True)
+    return sizes
+
+
+def _population():
+    rows = list(matchable_faces().values_list("user_id", "user__batch_id", "embedding"))
+    ids = np.asarray([row[0] for row in rows], dtype=np.int64)
+    batches = [row[1] for row in rows]
+    embeddings = np.asarray([row[2] for row in rows], dtype=np.float32).reshape(len(rows), -1)
+    return ids, batches, embeddings
+
+
+def _queries(embeddings, count, noise, rng):
+    picks = rng.integers(0, len(embeddings), count)
+    queries = embeddings[picks] + rng.standard_normal((count, embeddings.shape[1])).astype(np.float32) * noise
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def _memory_report(batches, embeddings):
+    print("\nroster cache memory (all batches)")
+    per_batch = {}
+    for index, batch_id in enumerate(batches):
+        per_batch.setdefault(batch_id, []).append(index)
+    for dtype in (np.float32, np.float16):
+        total = sum(
+            np.ascontiguousarray(embeddings[indices], dtype=dtype).nbytes
+            for indices in per_batch.values()
+        )
+        print(f"  {np.dtype(dtype).name:>8}: {total / 1024:.1f} KiB for {len(per_batch)} batches")
+
+
+def _memory_drift(embeddings, queries):
+    exact = distance_matrix(queries, embeddings)
+    half = distance_matrix(queries, embeddings.astype(np.float16))
+    agree = np.mean(np.argmin(exact, axis=1) == np.argmin(half, axis=1))
+    error = np.abs(np.min(exact, axis=1) - np.min(half, axis=1))
+    print("\nfloat16 vs float32 (in memory, whole population)")
+    print(f"  top-1 agreement {agree:.4f}  |distance error| p50 {np.median(error):.5f}  max {error.max():.5f}")
+
+
+def _database_drift(queries):
+    agree, errors, timings = [], [], {"exact": [], "halfvec": []}
+    for query in queries:
+        vector = query.tolist()
+
+        started = time.perf_counter()
+        exact = (
+            matchable_faces()
+            .annotate(distance=L2Distance("embedding", vector))
+            .order_by("distance")
+            .first()
+        )
+        timings["exact"].append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        half = next(iter(closest_faces(vector, 1)), None)
+        timings["halfvec"].append((time.perf_counter() - started) * 1000)
+
+        if exact is None or half is None:
+            continue
+        agree.append(exact.pk == half.pk)
+        errors.append(abs(exact.distance - half.distance))
+
+    print("\nhalfvec index + rescoring vs exact scan (Postgres)")
+    if not agree:
+        print("  no results")
+        return
+    print(f"  top-1 agreement {np.mean(agree):.4f}  |distance error| max {max(errors):.5f}")
+    for search, values in timings.items():
+        p50, p99 = np.percentile(values, [50, 99])
+        print(f"  {search:>8}: p50 {p50:.2f} ms  p99 {p99:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--db-queries", type=int, default=100)
+    parser.add_argument("--noise", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--float32-index",
+        action="store_true",
+        help="Also measure a float32 HNSW index (built and rolled back; blocks writes).",
+    )
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+
+    print("HNSW index size")
+    for name, size in _index_sizes(args.float32_index).items():
+        print(f"  {name:>32}: {'missing' if size is None else f'{size / 1024 / 1024:.2f} MiB'}")
+
+    ids, batches, embeddings = _population()
+    if not len(ids):
+        sys.exit("No enrolled users with a face embedding")
+    print(f"\n{len(ids)} enrolled users")
+
+    _memory_report(batches, embeddings)
+    _memory_drift(embeddings, _queries(embeddings, args.queries, args.noise, rng))
+    _database_drift(_queries(embeddings, args.db_queries, args.noise, rng))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Embedding parity and latency between two engines.
+
+Usage (from the backend directory):
+    python benchmarks/engine_parity.py [--images DIR] [--engines deepface,onnx]
+        [--tolerance 0.01]
+
+Every image is embedded by both engines. Embeddings are normalized the same
+way ``has_face`` does it and compared by cosine distance. Exits non-zero if
+any pair differs by more than ``--tolerance`` or if the engines disagree on
+whether an image contains a face.
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "main.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+import numpy as np  # noqa: E402
+
+from services.face_engines import build_engine  # noqa: E402
+from services.face_recognition import (  # noqa: E402
+    _decode_image_bgr,
+    _normalize_embedding,
+    get_detector_cascade,
+)
+
+IMAGE_PATTERNS = ("*.jpg", "*.jpeg", "*.png")
+
+
+def _load_images(directory):
+    paths = sorted(
+        path
+        for pattern in IMAGE_PATTERNS
+        for path in glob.glob(os.path.join(glob.escape(directory), "**", pattern), recursive=True)
+    )
+    images = []
+    for path in paths:
+        with open(path, "rb") as f:
+            image = _decode_image_bgr(f.read())
+        if image is not None:
+            images.append((path, image))
+    return images
+
+
+def _embed_all(engine, images):
+    # One warm-up call so model loading is not part of the timing.
+    engine.embed_batch([images[0][1]])
+
+    embeddings = []
+    started = time.perf_counter()
+    for _, image in images:
+        embedding = engine.embed_batch([image])[0]
+        embeddings.append(None if embedding is None else _normalize_embedding(embedding))
+    elapsed_ms = (time.perf_counter() - started) * 1000 / len(images)
+    return embeddings, elapsed_ms
+
+
+def main():
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", default=os.path.join(base_dir, "test_images"))
+    parser.add_argument("--engines", default="deepface,onnx")
+    parser.add_argument("--tolerance", type=float, default=0.01)
+    args = parser.parse_args()
+
+    reference_name, candidate_name = args.engines.split(",")
+    images = _load_images(args.images)
+    if not images:
+        sys.exit(f"No images found in {args.images}")
+
+    cascade = get_detector_cascade()
+    reference, reference_ms = _embed_all(build_engine(reference_name, cascade), images)
+    candidate, candidate_ms = _embed_all(build_engine(candidate_name, cascade), images)
+
+    print(f"{reference_name}: {reference_ms:.1f} ms/image, {candidate_name}: {candidate_ms:.1f} ms/image")
+    print(f"{'image':<40} {'cosine_distance':>16}")
+
+    failures = 0
+    distances = []
+    for (path, _), a, b in zip(images, reference, candidate):
+        name = os.path.relpath(path, args.images)
+        if a is None or b is None:
+            same = a is None and b is None
+            failures += 0 if same else 1
+            print(f"{name:<40} {'no face (both)' if same else 'MISMATCH: face found by one':>16}")
+            continue
+        distance = 1.0 - float(np.dot(a, b))
+        distances.append(distance)
+        failures += int(distance > args.tolerance)
+        print(f"{name:<40} {distance:>16.6f}")
+
+    if distances:
+        print(f"max {max(distances):.6f}, mean {np.mean(distances):.6f}, tolerance {args.tolerance}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Images/sec of the ArcFace pipeline vs. batch size.
+
+Usage (from the backend directory):
+    python benchmarks/face_batching.py [--image test_images/test.jpg]
+        [--sizes 1,2,4,8,16,32] [--rounds 3] [--concurrency 32]
+
+The first table calls ``embed_local_batch`` directly with N copies of the
+image. The second simulates a class-start spike: ``--concurrency`` threads
+submit at once through the micro-batcher for each window size.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "main.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+import numpy as np  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from services.face_batching import EmbeddingBatcher  # noqa: E402
+from services.face_recognition import embed_local_batch  # noqa: E402
+
+
+def _load_bgr(path):
+    return np.array(Image.open(path).convert("RGB"))[:, :, ::-1].copy()
+
+
+def bench_batch_sizes(image, sizes, rounds):
+    print(f"{'batch':>6} {'sec/batch':>10} {'images/sec':>11}")
+    for size in sizes:
+        images = [image] * size
+        elapsed = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            embed_local_batch(images)
+            elapsed.append(time.perf_counter() - started)
+        best = min(elapsed)
+        print(f"{size:>6} {best:>10.3f} {size / best:>11.1f}")
+
+
+def bench_spike(image, concurrency, windows, max_batch_size):
+    print(f"\n{concurrency} concurrent requests")
+    print(f"{'window_ms':>9} {'wall_sec':>9} {'images/sec':>11} {'mean_batch':>11}")
+    for window_ms in windows:
+        batcher = EmbeddingBatcher(
+            embed_local_batch, window_ms=window_ms, max_batch_size=max_batch_size
+        )
+        barrier = threading.Barrier(concurrency)
+
+        def worker():
+            barrier.wait()
+            batcher.submit(image)
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+
+        stats = batcher.stats()
+        print(
+            f"{window_ms:>9g} {wall:>9.3f} {concurrency / wall:>11.1f} "
+            f"{stats['mean_batch_size']:>11.1f}"
+        )
+
+
+def main():
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--image", default=os.path.join(base_dir, "test_images", "test.jpg"))
+    parser.add_argument("--sizes", default="1,2,4,8,16,32")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--windows", default="0,5,10,20")
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    args = parser.parse_args()
+
+    image = _load_bgr(args.image)
+
+    # Load the model before timing anything.
+    embed_local_batch([image])
+
+    bench_batch_sizes(image, [int(n) for n in args.sizes.split(",")], args.rounds)
+    bench_spike(
+        image,
+        args.concurrency,
+        [float(n) for n in args.windows.split(",")],
+        args.max_batch_size,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Recall/latency harness for 1:N face search: exact scan vs. ANN indexes.
+
+Usage (from the backend directory, against a local Postgres with pgvector):
+    python benchmarks/face_search.py [--sizes 10000,100000,1000000]
+        [--index hnsw:m=16,ef_construction=64] [--index ivfflat:lists=auto]
+        [--ef-search 20,40,80,160] [--probes 1,4,16] [--queries 200]
+        [--seed 0] [--csv results.csv]
+
+For each population size, scratch tables shaped like the production
+search (a face table joined to user rows with is_active/is_deleted) are
+filled with synthetic clustered 128-d unit vectors: users are drawn
+around --clusters centres, so near neighbours are realistically close
+rather than uniformly spread. Queries are noisy copies of enrolled
+vectors, like a re-captured face.
+
+Every --index configuration is built in turn (build time reported) and
+searched with each ef_search (HNSW) or probes (IVFFlat) value; recall@1
+is measured against the exact scan, with p50/p95/p99 latency. The same
+--seed gives the same data and queries, and index builds run without
+parallel workers so that graphs are reproducible too. The tables are
+dropped afterwards.
+"""
+
+import argparse
+import csv
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "main.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+import numpy as np  # noqa: E402
+from django.db import connection  # noqa: E402
+
+USERS = "bench_face_search_user"
+FACES = "bench_face_search_face"
+DIMENSIONS = 128
+CHUNK = 50_000
+
+DEFAULT_INDEXES = ["hnsw:m=16,ef_construction=64", "hnsw:m=32,ef_construction=128", "ivfflat:lists=auto"]
+
+SEARCH_SQL = (
+    f"SELECT f.user_id FROM {FACES} f JOIN {USERS} u ON u.id = f.user_id"
+    " WHERE f.embedding IS NOT NULL AND u.is_active AND NOT u.is_deleted"
+    " ORDER BY f.embedding <-> %s::vector LIMIT 1"
+)
+
+
+def _normalize(vectors):
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _literal(vector):
+    return "[" + ",".join(f"{x:.6f}" for x in vector) + "]"
+
+
+def _parse_index(spec, size):
+    """``hnsw:m=16,ef_construction=64`` -> ("hnsw", {"m": 16, ...})"""
+    method, _, params = spec.partition(":")
+    options = {}
+    for item in filter(None, params.split(",")):
+        key, _, value = item.partition("=")
+        options[key] = value
+    if method == "ivfflat" and options.get("lists", "auto") == "auto":
+        # pgvector's guidance: rows / 1000 up to 1M rows.
+        options["lists"] = str(max(1, size // 1000))
+    if method not in ("hnsw", "ivfflat"):
+        raise ValueError(f"Unknown index method {method!r}")
+    return method, {key: int(value) for key, value in options.items()}
+
+
+def _fill(cursor, size, rng, clusters, spread):
+    cursor.execute(f"DROP TABLE IF EXISTS {FACES}")
+    cursor.execute(f"DROP TABLE IF EXISTS {USERS}")
+    cursor.execute(
+        f"CREATE UNLOGGED TABLE {USERS} ("
+        " id bigint PRIMARY KEY, is_active boolean NOT NULL, is_deleted boolean NOT NULL)"
+    )
+    cursor.execute(
+        f"CREATE UNLOGGED TABLE {FACES} ("
+        f" user_id bigint PRIMARY KEY REFERENCES {USERS} (id), embedding vector({DIMENSIONS}))"
+    )
+
+    centres = _normalize(rng.standard_normal((clusters, DIMENSIONS)))
+    enrolled = np.empty((size, DIMENSIONS), dtype=np.float32)
+    for start in range(0, size, CHUNK):
+        count = min(CHUNK, size - start)
+        members = centres[rng.integers(0, clusters, count)]
+        vectors = _normalize(members + rng.standard_normal((count, DIMENSIONS)) * spread / np.sqrt(DIMENSIONS))
+        enrolled[start:start + count] = vectors
+
+        # ~5% of users are inactive or deleted, as in a real user table.
+        flags = rng.random(count)
+        users = io.StringIO()
+        faces = io.StringIO()
+        for offset, vector in enumerate(vectors):
+            user_id = start + offset
+            users.write(
+                f"{user_id}\t{'f' if flags[offset] < 0.03 else 't'}\t"
+                f"{'t' if 0.03 <= flags[offset] < 0.05 else 'f'}\n"
+            )
+            faces.write(f"{user_id}\t{_literal(vector)}\n")
+        users.seek(0)
+        faces.seek(0)
+        cursor.copy_expert(f"COPY {USERS} (id, is_active, is_deleted) FROM STDIN", users)
+        cursor.copy_expert(f"COPY {FACES} (user_id, embedding) FROM STDIN", faces)
+
+    cursor.execute(f"ANALYZE {USERS}")
+    cursor.execute(f"ANALYZE {FACES}")
+    return enrolled
+
+
+def _build_index(cursor, method, options):
+    cursor.execute("DROP INDEX IF EXISTS bench_face_search_ann")
+    cursor.execute("SET max_parallel_maintenance_workers = 0")
+    with_clause = ", ".join(f"{key} = {value}" for key, value in options.items())
+    started = time.perf_counter()
+    cursor.execute(
+        f"CREATE INDEX bench_face_search_ann ON {FACES} USING {method} (embedding vector_l2_ops)"
+        + (f" WITH ({with_clause})" if with_clause else "")
+        + " WHERE embedding IS NOT NULL"
+    )
+    return time.perf_counter() - started
+
+
+def _search(cursor, query, setting):
+    cursor.execute("BEGIN")
+    if setting is None:
+        cursor.execute("SET LOCAL enable_indexscan = off")
+    else:
+        name, value = setting
+        cursor.execute(f"SET LOCAL {name} = {int(value)}")
+    started = time.perf_counter()
+    cursor.execute(SEARCH_SQL, [_literal(query)])
+    row = cursor.fetchone()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    cursor.execute("COMMIT")
+    return (row[0] if row else None), elapsed_ms
+
+
+def _run(cursor, queries, setting, truth=None):
+    answers, timings = [], []
+    for query in queries:
+        answer, elapsed_ms = _search(cursor, query, setting)
+        answers.append(answer)
+        timings.append(elapsed_ms)
+    p50, p95, p99 = np.percentile(timings, [50, 95, 99])
+    recall = 1.0 if truth is None else float(np.mean([a == t for a, t in zip(answers, truth)]))
+    return answers, {"p50_ms": p50, "p95_ms": p95, "p99_ms": p99, "recall_at_1": recall}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--index", action="append", dest="indexes")
+    parser.add_argument("--ef-search", default="20,40,80,160")
+    parser.add_argument("--probes", default="1,4,16")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--clusters", type=int, default=256)
+    parser.add_argument("--spread", type=float, default=0.6, help="Within-cluster spread.")
+    parser.add_argument("--noise", type=float, default=0.3, help="Capture noise of the queries.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", help="Also write the results to this CSV file.")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    index_specs = args.indexes or DEFAULT_INDEXES
+    ef_values = [int(s) for s in args.ef_search.split(",")]
+    probe_values = [int(s) for s in args.probes.split(",")]
+
+    columns = ["users", "index", "build_s", "search", "p50_ms", "p95_ms", "p99_ms", "recall_at_1"]
+    rows = []
+
+    def report(row):
+        rows.append(row)
+        print(
+            f"{row['users']:>9} {row['index']:>34} {row['build_s']:>8} {row['search']:>14} "
+            f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['recall_at_1']:>9.3f}"
+        )
+
+    connection.ensure_connection()
+    cursor = connection.connection.cursor()
+    connection.connection.autocommit = True
+    try:
+        print(
+            f"{'users':>9} {'index':>34} {'build_s':>8} {'search':>14} "
+            f"{'p50_ms':>8} {'p95_ms':>8} {'p99_ms':>8} {'recall@1':>9}"
+        )
+        for size in sizes:
+            # One generator per size, so adding a size does not change the others.
+            rng = np.random.default_rng([args.seed, size])
+            enrolled = _fill(cursor, size, rng, args.clusters, args.spread)
+            picks = enrolled[rng.integers(0, size, args.queries)]
+            queries = _normalize(
+                picks + rng.standard_normal(picks.shape) * args.noise / np.sqrt(DIMENSIONS)
+            )
+
+            cursor.execute("DROP INDEX IF EXISTS bench_face_search_ann")
+            truth, stats = _run(cursor, queries, setting=None)
+            report({"users": size, "index": "none", "build_s": "-", "search": "exact", **stats})
+
+            for spec in index_specs:
+                method, options = _parse_index(spec, size)
+                build_s = _build_index(cursor, method, options)
+                label = method + "(" + ",".join(f"{k}={v}" for k, v in options.items()) + ")"
+                if method == "hnsw":
+                    settings = [("hnsw.ef_search", value) for value in ef_values]
+                else:
+                    settings = [("ivfflat.probes", value) for value in probe_values]
+                for setting in settings:
+                    _, stats = _run(cursor, queries, setting, truth)
+                    report({
+                        "users": size,
+                        "index": label,
+                        "build_s": f"{build_s:.1f}",
+                        "search": f"{setting[0].split('.')[1]}={setting[1]}",
+                        **stats,
+                    })
+    finally:
+        cursor.execute(f"DROP TABLE IF EXISTS {FACES}")
+        cursor.execute(f"DROP TABLE IF EXISTS {USERS}")
+        cursor.close()
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Latency and peak memory of the upload decode path.
+
+Compares the previous decode (full-resolution PIL decode, ``convert("RGB")``,
+then ``[:, :, ::-1].copy()`` to BGR) with ``_decode_image_bgr``.
+
+Usage (from the backend directory):
+    python benchmarks/image_decode.py [--image photo.jpg] [--rounds 10]
+
+Without ``--image`` a synthetic 4000x3000 (12MP) JPEG with an EXIF
+orientation tag is generated, similar to a phone camera upload.
+Peak memory is measured in a fresh child process per variant.
+"""
+
+import argparse
+import io
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "main.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+import numpy as np  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from services.face_recognition import _decode_image_bgr  # noqa: E402
+
+
+def legacy_decode(file_bytes):
+    pil_img = Image.open(io.BytesIO(file_bytes))
+    pil_img = pil_img.convert("RGB")
+    image_rgb = np.array(pil_img)
+    return image_rgb[:, :, ::-1].copy()
+
+
+VARIANTS = {
+    "legacy": legacy_decode,
+    "fast": _decode_image_bgr,
+}
+
+
+def synthetic_jpeg(width=4000, height=3000):
+    rng = np.random.default_rng(0)
+    # Smooth gradients plus noise compress like a photo, unlike pure noise.
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack([x % 256, y % 256, (x + y) % 256], axis=-1).astype(np.int16)
+    noise = rng.integers(-12, 12, size=(height, width, 1), dtype=np.int16)
+    pixels = np.clip(base + noise, 0, 255).astype(np.uint8)
+
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotated 90° clockwise, as most phones shoot portrait
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="JPEG", quality=90, exif=exif)
+    return buffer.getvalue()
+
+
+def _peak_rss_kb(name, file_bytes, results):
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    VARIANTS[name](file_bytes)
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results[name] = after - before
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--image")
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.image:
+        with open(args.image, "rb") as f:
+            file_bytes = f.read()
+    else:
+        file_bytes = synthetic_jpeg()
+
+    source = Image.open(io.BytesIO(file_bytes))
+    print(f"input: {source.size[0]}x{source.size[1]} {source.format}, {len(file_bytes) / 1e6:.1f} MB")
+
+    manager = multiprocessing.Manager()
+    peaks = manager.dict()
+    for name in VARIANTS:
+        process = multiprocessing.Process(target=_peak_rss_kb, args=(name, file_bytes, peaks))
+        process.start()
+        process.join()
+
+    print(f"{'variant':>8} {'shape':>16} {'p50_ms':>8} {'min_ms':>8} {'peak_MB':>8}")
+    for name, decode in VARIANTS.items():
+        image = decode(file_bytes)
+        timings = []
+        for _ in range(args.rounds):
+            started = time.perf_counter()
+            decode(file_bytes)
+            timings.append((time.perf_counter() - started) * 1000)
+        print(
+            f"{name:>8} {str(image.shape):>16} {np.median(timings):>8.1f} "
+            f"{min(timings):>8.1f} {peaks[name] / 1024:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Startup time for each FACE_WARMUP policy.
+
+Usage (from the backend directory):
+    python benchmarks/startup_time.py [--rounds 3]
+
+For every policy a fresh interpreter imports ``main.wsgi`` (what gunicorn
+and runserver do) and the wall time until the import returns is reported,
+together with whether TensorFlow ended up loaded. ``manage.py check`` is
+timed as well, since management commands must never pay the model cost.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+POLICIES = ["disabled", "background", "eager"]
+
+_WSGI_PROBE = (
+    "import sys, main.wsgi; "
+    "print('tensorflow' in sys.modules)"
+)
+
+
+def _run(command, policy):
+    env = {**os.environ, "FACE_WARMUP": policy, "DJANGO_SETTINGS_MODULE": "main.settings"}
+    started = time.perf_counter()
+    completed = subprocess.run(
+        command, cwd=BASE_DIR, env=env, capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+    return elapsed, completed.stdout.strip().splitlines()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'target':>14} {'policy':>11} {'median_s':>9} {'tf_loaded':>10}")
+
+    for policy in POLICIES:
+        timings = []
+        tf_loaded = "?"
+        for _ in range(args.rounds):
+            elapsed, lines = _run([sys.executable, "-c", _WSGI_PROBE], policy)
+            timings.append(elapsed)
+            tf_loaded = lines[-1] if lines else "?"
+        print(f"{'main.wsgi':>14} {policy:>11} {statistics.median(timings):>9.2f} {tf_loaded:>10}")
+
+    for policy in POLICIES:
+        timings = [
+            _run([sys.executable, "manage.py", "check"], policy)[0]
+            for _ in range(args.rounds)
+        ]
+        print(f"{'manage.py check':>14} {policy:>11} {statistics.median(timings):>9.2f} {'-':>10}")
+
+
+if __name__ == "__main__":
+    main()
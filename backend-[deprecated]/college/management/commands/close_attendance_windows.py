@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from college.utils.window_closer import close_finished_windows, next_window_end
+
+
+class Command(BaseCommand):
+    help = (
+        "Close finished attendance windows and record every student of the "
+        "batch without a mark as ABSENT."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running, waking up when the next open window ends.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=60.0,
+            help="Longest sleep between passes with --loop, in seconds.",
+        )
+        parser.add_argument("--batch-size", type=int, default=100, help="Windows per statement.")
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        if not options["loop"]:
+            self._close(batch_size)
+            return
+
+        interval = max(1.0, options["interval"])
+        try:
+            while True:
+                close_old_connections()
+                self._close(batch_size)
+
+                # Windows opened meanwhile end no earlier than now + their
+                # duration, so the interval bounds how late they are closed.
+                next_end = next_window_end()
+                delay = interval
+                if next_end is not None:
+                    delay = min(interval, max(1.0, (next_end - timezone.now()).total_seconds()))
+                time.sleep(delay)
+        except KeyboardInterrupt:
+            pass
+
+    def _close(self, batch_size):
+        windows, absences = close_finished_windows(limit=batch_size)
+        if windows or self.verbosity > 1:
+            self.stdout.write(
+                self.style.SUCCESS(f"✅ {windows} windows closed, {absences} students marked absent")
+            )
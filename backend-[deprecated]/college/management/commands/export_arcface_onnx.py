@@ -0,0 +1,39 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from services.face_engines import ARCFACE_INPUT_SIZE
+
+
+class Command(BaseCommand):
+    help = "Export DeepFace's ArcFace model to ONNX for FACE_EMBEDDING_ENGINE='onnx'."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default=str(settings.FACE_ONNX_MODEL_PATH),
+            help="Destination .onnx file (defaults to FACE_ONNX_MODEL_PATH).",
+        )
+        parser.add_argument("--opset", type=int, default=17)
+
+    def handle(self, *args, **options):
+        try:
+            import tensorflow as tf
+            import tf2onnx
+        except ImportError as e:
+            raise CommandError(f"Exporting requires tensorflow and tf2onnx: {e}")
+
+        from deepface import DeepFace
+
+        model = DeepFace.build_model(model_name="ArcFace").model
+        height, width = ARCFACE_INPUT_SIZE
+        signature = (tf.TensorSpec((None, height, width, 3), tf.float32, name="input"),)
+
+        output = options["output"]
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        tf2onnx.convert.from_keras(
+            model, input_signature=signature, opset=options["opset"], output_path=output
+        )
+
+        self.stdout.write(self.style.SUCCESS(f"✅ ArcFace exported to {output}"))
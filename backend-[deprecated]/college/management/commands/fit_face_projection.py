@@ -0,0 +1,120 @@
+import glob
+import os
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from services.face_matching import equal_error_threshold, pair_distances
+from services.face_projection import Projection, fit_pca, fit_random
+from services.face_recognition import _decode_image_bgr, embed_local_batch
+
+IMAGE_PATTERNS = ("*.jpg", "*.jpeg", "*.png")
+BATCH_SIZE = 32
+
+
+def _labelled_paths(directory):
+    """DIR/<person>/<image>; images directly in DIR are unlabelled."""
+    paths = []
+    for root, _, _ in os.walk(directory):
+        label = os.path.relpath(root, directory)
+        for pattern in IMAGE_PATTERNS:
+            for path in sorted(glob.glob(os.path.join(glob.escape(root), pattern))):
+                paths.append((None if label == "." else label, path))
+    return paths
+
+
+def _separation(embeddings, labels):
+    """Genuine/impostor distance gap and the equal-error threshold."""
+    genuine, impostor = pair_distances(embeddings, labels)
+    eer = equal_error_threshold(genuine, impostor)
+    if eer is None:
+        return None
+
+    threshold, frr, _ = eer
+    return {
+        "genuine_p50": float(np.median(genuine)),
+        "impostor_p50": float(np.median(impostor)),
+        "eer_threshold": threshold,
+        "eer": frr,
+    }
+
+
+class Command(BaseCommand):
+    help = "Fit the 512->128 embedding projection on a directory of face images."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--images",
+            required=True,
+            help="Directory of face images, optionally one sub-directory per person.",
+        )
+        parser.add_argument("--method", choices=["pca", "random"], default="pca")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--output",
+            default=settings.FACE_PROJECTION_PATH
+            or str(settings.BASE_DIR / "models" / "arcface_projection.npy"),
+        )
+
+    def handle(self, *args, **options):
+        paths = _labelled_paths(options["images"])
+        if not paths:
+            raise CommandError(f"No images found in {options['images']}")
+
+        labels, raw = [], []
+        for start in range(0, len(paths), BATCH_SIZE):
+            chunk = paths[start:start + BATCH_SIZE]
+            images, chunk_labels = [], []
+            for label, path in chunk:
+                with open(path, "rb") as f:
+                    image = _decode_image_bgr(f.read())
+                if image is not None:
+                    images.append(image)
+                    chunk_labels.append(label)
+            for label, embedding in zip(chunk_labels, embed_local_batch(images)):
+                if embedding is not None:
+                    labels.append(label)
+                    raw.append(np.asarray(embedding, dtype=np.float32))
+        self.stdout.write(f"{len(raw)} faces embedded from {len(paths)} images")
+
+        if options["method"] == "pca":
+            try:
+                matrix, explained = fit_pca(raw)
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stdout.write(f"PCA keeps {explained:.1%} of the variance")
+        else:
+            matrix = fit_random(options["seed"])
+
+        os.makedirs(os.path.dirname(os.path.abspath(options["output"])), exist_ok=True)
+        np.save(options["output"], matrix)
+        projection = Projection(matrix)
+
+        labelled = [i for i, label in enumerate(labels) if label is not None]
+        if labelled:
+            raw = np.stack(raw)[labelled]
+            labels = [labels[i] for i in labelled]
+
+            truncated = raw[:, :128] / np.linalg.norm(raw[:, :128], axis=1, keepdims=True)
+            projected = projection.apply(raw)
+            projected /= np.linalg.norm(projected, axis=1, keepdims=True)
+
+            for name, embeddings in (("truncate", truncated), ("projection", projected)):
+                stats = _separation(embeddings, labels)
+                if stats is None:
+                    continue
+                self.stdout.write(
+                    f"{name:>10}: genuine p50 {stats['genuine_p50']:.3f}  "
+                    f"impostor p50 {stats['impostor_p50']:.3f}  "
+                    f"EER {stats['eer']:.3f} at threshold {stats['eer_threshold']:.3f}"
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ Projection {projection.version} written to {options['output']}"
+            )
+        )
+        self.stdout.write(
+            "Set FACE_PROJECTION_PATH to it and re-embed stored faces before switching."
+        )
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Dynamically quantize the ArcFace ONNX model to int8 weights."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--input", default=str(settings.FACE_ONNX_MODEL_PATH))
+        parser.add_argument("--output", default=str(settings.FACE_ONNX_INT8_MODEL_PATH))
+        parser.add_argument(
+            "--per-channel",
+            action="store_true",
+            help="Quantize weights per output channel (usually closer to fp32).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+        except ImportError as e:
+            raise CommandError(f"Quantization requires onnxruntime: {e}")
+
+        quantize_dynamic(
+            model_input=options["input"],
+            model_output=options["output"],
+            weight_type=QuantType.QInt8,
+            per_channel=options["per_channel"],
+        )
+
+        self.stdout.write(self.style.SUCCESS(f"✅ int8 model written to {options['output']}"))
+        self.stdout.write(
+            "Compare it with: python benchmarks/arcface_int8_report.py --images <labelled dir>"
+        )
@@ -0,0 +1,204 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F, Q
+
+from college.models import FaceEmbedding, User
+from college.utils.roster_cache import invalidate as invalidate_roster
+from services.face_recognition import embedding_version
+from services.face_reembed import embed_images, fetch_image, init_worker
+
+
+def _enrolled():
+    return User.objects.filter(is_deleted=False).exclude(
+        Q(profile_picture__isnull=True) | Q(profile_picture="")
+    )
+
+
+def _pending(target):
+    """Enrolled users with no embedding of ``target`` in either slot yet."""
+    return _enrolled().exclude(face__version=target).exclude(face__next_version=target)
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-embed every stored profile picture with the current face pipeline "
+        "into the shadow embedding slot, then switch over with --cutover."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=2,
+            help="Embedding processes, each with its own model (0 embeds in this process).",
+        )
+        parser.add_argument("--fetchers", type=int, default=16, help="Concurrent image downloads.")
+        parser.add_argument("--batch-size", type=int, default=64, help="Images per forward pass.")
+        parser.add_argument(
+            "--cutover",
+            action="store_true",
+            help="Atomically make the re-embedded vectors the live ones.",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Cut over even if some users have not been re-embedded.",
+        )
+
+    def handle(self, *args, **options):
+        target = embedding_version()
+        self.stdout.write(f"Target embedding version: {target}")
+
+        if options["cutover"]:
+            self._cutover(target, options["force"])
+        else:
+            self._reembed(target, options)
+
+    def _reembed(self, target, options):
+        pending = _pending(target)
+        total = pending.count()
+        if not total:
+            self.stdout.write(self.style.SUCCESS("✅ Nothing to re-embed"))
+            return
+
+        batch_size = max(1, options["batch_size"])
+        workers = max(0, options["workers"])
+        chunk_size = batch_size * max(1, workers) * 2
+
+        embed_pool = None
+        if workers:
+            embed_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+            )
+        embed_map = embed_pool.map if embed_pool else map
+
+        started = time.perf_counter()
+        done = embedded = failed = 0
+        last_id = 0
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, options["fetchers"])) as fetch_pool:
+                while True:
+                    # Keyset pagination over rows still pending, so an
+                    # interrupted run resumes where it stopped.
+                    users = list(
+                        pending.filter(id__gt=last_id)
+                        .order_by("id")
+                        .values("id", "batch_id", "profile_picture")[:chunk_size]
+                    )
+                    if not users:
+                        break
+                    last_id = users[-1]["id"]
+
+                    images = fetch_pool.map(fetch_image, [user["profile_picture"] for user in users])
+                    items = [(user["id"], data) for user, data in zip(users, images)]
+                    batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+
+                    updates = []
+                    for results in embed_map(embed_images, batches):
+                        for user_id, embedding, fetched in results:
+                            # A failed download stays pending for the next run.
+                            if not fetched:
+                                failed += 1
+                                continue
+                            # A picture without a usable face is recorded too,
+                            # so it counts as covered and is not retried.
+                            updates.append(
+                                FaceEmbedding(
+                                    user_id=user_id,
+                                    next_embedding=embedding,
+                                    next_version=target,
+                                )
+                            )
+                            embedded += embedding is not None
+
+                    # Users enrolled before their face row existed get one.
+                    FaceEmbedding.objects.bulk_create(
+                        updates,
+                        update_conflicts=True,
+                        unique_fields=["user"],
+                        update_fields=["next_embedding", "next_version", "updated_at"],
+                    )
+                    # bulk_create sends no signals
+                    for batch_id in {user["batch_id"] for user in users}:
+                        invalidate_roster(batch_id)
+
+                    done += len(users)
+                    elapsed = time.perf_counter() - started
+                    rate = done / elapsed if elapsed else 0.0
+                    eta = (total - done) / rate if rate else 0.0
+                    self.stdout.write(
+                        f"{done}/{total} users  {rate:.1f} users/s  "
+                        f"{done - embedded - failed} without a face  "
+                        f"{failed} not downloaded  ETA {eta:.0f}s"
+                    )
+        finally:
+            if embed_pool:
+                embed_pool.shutdown()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ {done - failed} users re-embedded in {time.perf_counter() - started:.1f}s "
+                f"({done - embedded - failed} without a usable face)"
+            )
+        )
+        if failed:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{failed} profile pictures could not be downloaded; "
+                    "they are still pending, run again before --cutover."
+                )
+            )
+        self.stdout.write("Deploy the new pipeline to the web workers, then run with --cutover.")
+
+    def _cutover(self, target, force):
+        with transaction.atomic():
+            pending = _pending(target).count()
+            if pending and not force:
+                raise CommandError(
+                    f"{pending} enrolled users have no {target} embedding yet; "
+                    "run without --cutover first (or pass --force)."
+                )
+
+            # A picture that no longer yields a face must not replace a
+            # working live vector with NULL; those users keep the old one
+            # until they re-enroll.
+            faceless = FaceEmbedding.objects.filter(
+                next_version=target, next_embedding__isnull=True, embedding__isnull=False
+            )
+            kept = faceless.count()
+
+            # One UPDATE swaps the slots (right-hand sides see the old row), so
+            # the previous vectors stay in the shadow slot for a rollback.
+            ready = FaceEmbedding.objects.filter(next_version=target).exclude(
+                next_embedding__isnull=True, embedding__isnull=False
+            )
+            batch_ids = set(ready.values_list("user__batch_id", flat=True))
+            swapped = ready.update(
+                embedding=F("next_embedding"),
+                version=F("next_version"),
+                next_embedding=F("embedding"),
+                next_version=F("version"),
+            )
+
+            def invalidate_rosters():
+                for batch_id in batch_ids:
+                    invalidate_roster(batch_id)
+
+            transaction.on_commit(invalidate_rosters)
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {swapped} users switched to {target}"))
+        if pending:
+            self.stdout.write(self.style.WARNING(f"{pending} users were not re-embedded"))
+        if kept:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{kept} users kept their previous embedding: no face was found in "
+                    "their profile picture with the new pipeline. They need to re-enroll."
+                )
+            )
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from services.face_server import serve
+
+
+class Command(BaseCommand):
+    help = "Run the out-of-process face inference server on a Unix socket."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--socket",
+            default=getattr(settings, "FACE_INFERENCE_SOCKET", None),
+            help="Unix socket path (defaults to FACE_INFERENCE_SOCKET).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=getattr(settings, "FACE_INFERENCE_WORKERS", 1),
+            help="Number of worker processes, each holding one copy of the model.",
+        )
+
+    def handle(self, *args, **options):
+        socket_path = options["socket"]
+        if not socket_path:
+            raise CommandError("Set FACE_INFERENCE_SOCKET or pass --socket.")
+
+        self.stdout.write(
+            f"🚀 Face inference server on {socket_path} "
+            f"({options['workers']} worker(s))"
+        )
+        serve(socket_path, workers=options["workers"])
@@ -0,0 +1,27 @@
+import pgvector.django.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Building the index concurrently keeps the user table writable.
+    atomic = False
+
+    dependencies = [
+        ('college', '0013_alter_attendance_window_unique_together'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='user',
+            index=pgvector.django.indexes.HnswIndex(
+                condition=models.Q(('face_embedding__isnull', False), ('is_active', True), ('is_deleted', False)),
+                ef_construction=64,
+                fields=['face_embedding'],
+                m=16,
+                name='user_face_embedding_hnsw',
+                opclasses=['vector_l2_ops'],
+            ),
+        ),
+    ]
@@ -0,0 +1,34 @@
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+import pgvector.django.halfvec
+import pgvector.django.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # Building the index concurrently keeps the user table writable.
+    atomic = False
+
+    dependencies = [
+        ('college', '0014_user_face_embedding_hnsw'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='user',
+            index=pgvector.django.indexes.HnswIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.comparison.Cast(
+                        'face_embedding', pgvector.django.halfvec.HalfVectorField(dimensions=128)
+                    ),
+                    name='halfvec_l2_ops',
+                ),
+                condition=models.Q(('face_embedding__isnull', False), ('is_active', True), ('is_deleted', False)),
+                ef_construction=64,
+                m=16,
+                name='user_face_embedding_half_hnsw',
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+def tag_existing_embeddings(apps, schema_editor):
+    # Everything stored so far is the first 128 dims of ArcFace.
+    User = apps.get_model('college', 'User')
+    User.objects.filter(face_embedding__isnull=False).update(face_embedding_version='v1')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('college', '0015_user_face_embedding_half_hnsw'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='face_embedding_version',
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+        migrations.RunPython(tag_existing_embeddings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+import pgvector.django.vector
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('college', '0016_user_face_embedding_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='face_embedding_next',
+            field=pgvector.django.vector.VectorField(blank=True, dimensions=128, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='face_embedding_next_version',
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+    ]
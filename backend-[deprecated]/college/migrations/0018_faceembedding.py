@@ -0,0 +1,81 @@
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+import django.db.models.functions.comparison
+import pgvector.django.halfvec
+import pgvector.django.indexes
+import pgvector.django.vector
+from django.conf import settings
+from django.db import migrations, models
+
+
+COPY_TO_FACE_TABLE = """
+INSERT INTO college_faceembedding (user_id, embedding, version, next_embedding, next_version, updated_at)
+SELECT id, face_embedding, face_embedding_version, face_embedding_next, face_embedding_next_version, NOW()
+FROM college_user
+WHERE face_embedding IS NOT NULL OR face_embedding_next IS NOT NULL
+"""
+
+COPY_TO_USER_TABLE = """
+UPDATE college_user AS u
+SET face_embedding = f.embedding,
+    face_embedding_version = f.version,
+    face_embedding_next = f.next_embedding,
+    face_embedding_next_version = f.next_version
+FROM college_faceembedding AS f
+WHERE f.user_id = u.id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('college', '0017_user_face_embedding_next'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FaceEmbedding',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='face', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('embedding', pgvector.django.vector.VectorField(blank=True, dimensions=128, null=True)),
+                ('version', models.CharField(blank=True, max_length=32, null=True)),
+                ('next_embedding', pgvector.django.vector.VectorField(blank=True, dimensions=128, null=True)),
+                ('next_version', models.CharField(blank=True, max_length=32, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        # Copied before the indexes are added, so they are built in one pass.
+        migrations.RunSQL(COPY_TO_FACE_TABLE, COPY_TO_USER_TABLE),
+        migrations.AddIndex(
+            model_name='faceembedding',
+            index=pgvector.django.indexes.HnswIndex(condition=models.Q(('embedding__isnull', False)), ef_construction=64, fields=['embedding'], m=16, name='face_embedding_hnsw', opclasses=['vector_l2_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='faceembedding',
+            index=pgvector.django.indexes.HnswIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.comparison.Cast('embedding', pgvector.django.halfvec.HalfVectorField(dimensions=128)), name='halfvec_l2_ops'), condition=models.Q(('embedding__isnull', False)), ef_construction=64, m=16, name='face_embedding_half_hnsw'),
+        ),
+        migrations.RemoveIndex(
+            model_name='user',
+            name='user_face_embedding_hnsw',
+        ),
+        migrations.RemoveIndex(
+            model_name='user',
+            name='user_face_embedding_half_hnsw',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='face_embedding',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='face_embedding_next',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='face_embedding_next_version',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='face_embedding_version',
+        ),
+    ]
@@ -0,0 +1,38 @@
+import django.db.models.deletion
+import pgvector.django.vector
+from django.db import migrations, models
+
+
+# Every enrolled face starts with its current embedding as the enrollment
+# template, so its centroid is unchanged.
+SEED_ENROLLMENT_TEMPLATES = """
+INSERT INTO college_facetemplate (face_id, embedding, version, source, created_at)
+SELECT user_id, embedding, version, 'enrollment', NOW()
+FROM college_faceembedding
+WHERE embedding IS NOT NULL AND version IS NOT NULL
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('college', '0018_faceembedding'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FaceTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('embedding', pgvector.django.vector.VectorField(dimensions=128)),
+                ('version', models.CharField(max_length=32)),
+                ('source', models.CharField(choices=[('enrollment', 'Enrollment'), ('attendance', 'Attendance')], default='enrollment', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('face', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='templates', to='college.faceembedding')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['face', 'version'], name='college_fac_face_id_a4852d_idx')],
+            },
+        ),
+        migrations.RunSQL(SEED_ENROLLMENT_TEMPLATES, migrations.RunSQL.noop),
+    ]
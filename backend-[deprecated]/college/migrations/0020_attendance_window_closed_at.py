@@ -0,0 +1,29 @@
+from django.db import migrations, models
+
+
+# Windows that finished before today are marked closed without recording
+# absences: the batch's current students are not who was enrolled back
+# then. Today's finished windows are left to close_attendance_windows.
+BACKFILL_CLOSED_AT = """
+UPDATE college_attendance_window
+SET closed_at = start_time + make_interval(secs => duration)
+WHERE closed_at IS NULL
+  AND date < CURRENT_DATE
+  AND (NOT is_active OR start_time + make_interval(secs => duration) <= NOW())
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('college', '0019_facetemplate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance_window',
+            name='closed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunSQL(BACKFILL_CLOSED_AT, migrations.RunSQL.noop),
+    ]
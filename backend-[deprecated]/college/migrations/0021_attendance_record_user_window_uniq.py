@@ -0,0 +1,65 @@
+from django.db import migrations, models
+
+
+# Keeps one record per (user, window): a PRESENT one if any, else the latest.
+DEDUPE_RECORDS = """
+DELETE FROM college_attendance_record AS r
+USING (
+    SELECT id, ROW_NUMBER() OVER (
+        PARTITION BY user_id, attendance_window_id
+        ORDER BY (status = 'P') DESC, id DESC
+    ) AS position
+    FROM college_attendance_record
+) AS ranked
+WHERE r.id = ranked.id AND ranked.position > 1
+"""
+
+# A failed concurrent build leaves an invalid index behind.
+DROP_INVALID_INDEX = """
+DROP INDEX CONCURRENTLY IF EXISTS attendance_record_user_window_uniq
+"""
+
+CREATE_UNIQUE_INDEX = """
+CREATE UNIQUE INDEX CONCURRENTLY attendance_record_user_window_uniq
+ON college_attendance_record (user_id, attendance_window_id)
+"""
+
+ADD_CONSTRAINT = """
+ALTER TABLE college_attendance_record
+ADD CONSTRAINT attendance_record_user_window_uniq
+UNIQUE USING INDEX attendance_record_user_window_uniq
+"""
+
+DROP_CONSTRAINT = """
+ALTER TABLE college_attendance_record
+DROP CONSTRAINT IF EXISTS attendance_record_user_window_uniq
+"""
+
+
+class Migration(migrations.Migration):
+
+    # The unique index is built concurrently so that attendance can still be
+    # marked. A duplicate inserted meanwhile fails the build; rerunning the
+    # migration dedupes again and rebuilds.
+    atomic = False
+
+    dependencies = [
+        ('college', '0020_attendance_window_closed_at'),
+    ]
+
+    operations = [
+        migrations.RunSQL(DEDUPE_RECORDS, migrations.RunSQL.noop),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(DROP_INVALID_INDEX, migrations.RunSQL.noop),
+                migrations.RunSQL(CREATE_UNIQUE_INDEX, DROP_CONSTRAINT),
+                migrations.RunSQL(ADD_CONSTRAINT, migrations.RunSQL.noop),
+            ],
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name='attendance_record',
+                    constraint=models.UniqueConstraint(fields=('user', 'attendance_window'), name='attendance_record_user_window_uniq'),
+                ),
+            ],
+        ),
+    ]
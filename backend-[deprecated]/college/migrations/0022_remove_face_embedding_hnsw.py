@@ -0,0 +1,20 @@
+from django.contrib.postgres.operations import RemoveIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    # Dropping the index concurrently keeps the face table writable.
+    atomic = False
+
+    dependencies = [
+        ('college', '0021_attendance_record_user_window_uniq'),
+    ]
+
+    operations = [
+        # Search goes through face_embedding_half_hnsw only.
+        RemoveIndexConcurrently(
+            model_name='faceembedding',
+            name='face_embedding_hnsw',
+        ),
+    ]
@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Windows that are open now, or were closed, certainly opened. Windows that
+# are inactive without ever being closed cannot be told apart from windows
+# that never opened, so they are left out and never get ABSENT records.
+BACKFILL_OPENED_AT = """
+UPDATE college_attendance_window
+SET opened_at = start_time
+WHERE is_active OR closed_at IS NOT NULL
+"""
+
+# ABSENT records used to be credited to the student themselves.
+REATTRIBUTE_ABSENCES = """
+UPDATE college_attendance_record AS r
+SET marked_by_id = COALESCE(w.last_interacted_by_id, s.faculty_id)
+FROM college_attendance_window AS w
+LEFT JOIN college_subject AS s ON s.id = w.target_subject_id
+WHERE w.id = r.attendance_window_id
+  AND r.status = 'A'
+  AND r.marked_by_id = r.user_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('college', '0022_remove_face_embedding_hnsw'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance_window',
+            name='opened_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='attendance_record',
+            name='marked_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='attendance_records_marked_by', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunSQL(BACKFILL_OPENED_AT, migrations.RunSQL.noop),
+        migrations.RunSQL(REATTRIBUTE_ABSENCES, migrations.RunSQL.noop),
+    ]
@@ -6,7 +6,9 @@ from django.contrib.auth.models import (
     BaseUserManager,
 )
 from django.utils import timezone
-from pgvector.django import VectorField
+from django.contrib.postgres.indexes import OpClass
+from django.db.models.functions import Cast
+from pgvector.django import HalfVectorField, HnswIndex, VectorField
 
 class University(models.Model):
     name = models.CharField(max_length=255, null=True, blank=True, db_index=True)
@@ -114,7 +116,6 @@ class User(AbstractBaseUser, PermissionsMixin):
     country = models.CharField(max_length=255, null=True, blank=True)
     pincode = models.CharField(max_length=20, null=True, blank=True)
     profile_picture = models.CharField(max_length=255, null=True, blank=True)
-    face_embedding = VectorField(dimensions=128, null=True, blank=True)
     can_update_picture = models.BooleanField(default=False, db_index=True) # type: ignore[arg-type]
 
     # --- status flags ---
@@ -135,6 +136,85 @@ class User(AbstractBaseUser, PermissionsMixin):
         return f"{self.name or self.email or 'Unknown'} ({self.role})"
 
 
+class FaceEmbedding(models.Model):
+    """
+    A user's enrolled face, kept out of the user row so that user lookups
+    (JWT auth, listings, serializers) never load the vector.
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="face"
+    )
+    embedding = VectorField(dimensions=128, null=True, blank=True)
+    # services.face_recognition.embedding_version() of embedding
+    version = models.CharField(max_length=32, null=True, blank=True)
+    # Shadow slot filled by `manage.py reembed_faces` ahead of a model
+    # upgrade; see embedding_for()
+    next_embedding = VectorField(dimensions=128, null=True, blank=True)
+    next_version = models.CharField(max_length=32, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # 1:N face search, over a half-precision copy of the embedding
+            # (half the size of a float32 index); the column stays float32
+            # to rescore the FACE_SEARCH_RESCORE_K candidates it returns.
+            # Active/deleted flags live on the user row, so they are
+            # filtered through the join instead of the index.
+            HnswIndex(
+                OpClass(
+                    Cast("embedding", HalfVectorField(dimensions=128)),
+                    name="halfvec_l2_ops",
+                ),
+                name="face_embedding_half_hnsw",
+                m=16,
+                ef_construction=64,
+                condition=models.Q(embedding__isnull=False),
+            ),
+        ]
+
+    def __str__(self):
+        return f"Face of {self.user_id} ({self.version})"
+
+    def embedding_for(self, version):
+        """
+        The stored embedding of the given version from either slot, or None.
+        Lets old and new workers both match while a re-embedding is rolled out.
+        """
+        if self.embedding is not None and self.version == version:
+            return self.embedding
+        if self.next_embedding is not None and self.next_version == version:
+            return self.next_embedding
+        return None
+
+
+class FaceTemplate(models.Model):
+    """
+    One of up to FACE_GALLERY_SIZE embeddings of a user's face: the
+    enrollment photo plus confident attendance captures. The user's
+    FaceEmbedding holds the centroid of the current-version templates, so
+    1:N search stays at one vector per person; templates are compared only
+    for the closest candidates (see college.utils.face_gallery).
+    """
+
+    class Source(models.TextChoices):
+        ENROLLMENT = "enrollment", "Enrollment"
+        ATTENDANCE = "attendance", "Attendance"
+
+    # face_id is the user id
+    face = models.ForeignKey(FaceEmbedding, on_delete=models.CASCADE, related_name="templates")
+    embedding = VectorField(dimensions=128)
+    version = models.CharField(max_length=32)
+    source = models.CharField(max_length=20, choices=Source.choices, default=Source.ENROLLMENT)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["face", "version"])]
+
+    def __str__(self):
+        return f"{self.source} template of {self.face_id} ({self.version})"
+
+
 class Subject(models.Model):
     batch = models.ForeignKey(Batch, on_delete=models.CASCADE, related_name="subjects")
     faculty = models.ForeignKey(
@@ -179,6 +259,12 @@ class Attendance_Window(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     date = models.DateField(default=timezone.localdate)
+    # When the window was last opened; windows that never opened are not
+    # closed by `manage.py close_attendance_windows`
+    opened_at = models.DateTimeField(null=True, blank=True)
+    # Set by `manage.py close_attendance_windows` once the window is closed
+    # and every student of the batch has a record
+    closed_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         unique_together = ("target_batch", "target_subject", "date")
@@ -206,13 +292,26 @@ class Attendance_Record(models.Model):
     status = models.CharField(max_length=255, default=Status.NOT_APPLICABLE) # type: ignore[arg-type]
     created_at = models.DateTimeField(auto_now_add=True)
     date = models.DateField(default=timezone.localdate)
+    # NULL for ABSENT records of windows nobody can be credited with closing
     marked_by = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         related_name="attendance_records_marked_by",
         db_index=True,
+        null=True,
+        blank=True,
     )
 
+    class Meta:
+        constraints = [
+            # One record per student and window (windows are per date);
+            # marks upsert against it, see college.utils.attendance_marks
+            models.UniqueConstraint(
+                fields=["user", "attendance_window"],
+                name="attendance_record_user_window_uniq",
+            ),
+        ]
+
 
 class Announcement(models.Model):
     """Model to store announcements with support for text, audio, and video content."""
@@ -0,0 +1,43 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import FaceEmbedding, User
+from .utils.roster_cache import invalidate as invalidate_roster
+
+# User fields that change who is in a batch roster.
+_ROSTER_FIELDS = ("batch", "role", "is_active", "is_deleted")
+
+
+@receiver(pre_save, sender=User)
+def remember_roster_batch(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not any(
+        field in update_fields for field in _ROSTER_FIELDS + ("batch_id",)
+    ):
+        instance._roster_batches = ()
+        return
+
+    previous = None
+    if instance.pk:
+        previous = User.objects.filter(pk=instance.pk).values_list("batch_id", flat=True).first()
+    instance._roster_batches = {previous, instance.batch_id}
+
+
+@receiver(post_save, sender=User)
+def invalidate_roster_on_save(sender, instance, **kwargs):
+    for batch_id in getattr(instance, "_roster_batches", {instance.batch_id}):
+        invalidate_roster(batch_id)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_roster_on_delete(sender, instance, **kwargs):
+    invalidate_roster(instance.batch_id)
+
+
+@receiver(post_save, sender=FaceEmbedding)
+@receiver(post_delete, sender=FaceEmbedding)
+def invalidate_roster_on_face_change(sender, instance, **kwargs):
+    batch_id = User.objects.filter(pk=instance.user_id).values_list("batch_id", flat=True).first()
+    # Centroid and templates change in one transaction; a roster reloaded
+    # before it commits would keep the old gallery under the new version.
+    transaction.on_commit(lambda: invalidate_roster(batch_id))
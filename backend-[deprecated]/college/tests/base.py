@@ -0,0 +1,28 @@
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models import Attendance_Window, Batch, Subject, User
+
+
+class AttendanceTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.batch = Batch.objects.create(name="B1")
+        cls.other_batch = Batch.objects.create(name="B2")
+        cls.teacher = User.objects.create_user("teacher@example.com", role=User.Role.TEACHER)
+        cls.subject = Subject.objects.create(batch=cls.batch, faculty=cls.teacher, name="Maths")
+
+    def make_student(self, email, batch=None, **fields):
+        return User.objects.create_user(
+            email, role=User.Role.STUDENT, batch=batch or self.batch, **fields
+        )
+
+    def make_window(self, **fields):
+        fields.setdefault("start_time", timezone.now())
+        fields.setdefault("duration", 300)
+        fields.setdefault("is_active", True)
+        fields.setdefault("opened_at", fields["start_time"] if fields["is_active"] else None)
+        fields.setdefault("target_subject", self.subject)
+        fields.setdefault("last_interacted_by", self.teacher)
+        return Attendance_Window.objects.create(target_batch=self.batch, **fields)
@@ -0,0 +1,53 @@
+from ..models import Attendance_Record
+from ..utils.attendance_marks import mark_present, mark_present_many
+from .base import AttendanceTestCase
+
+
+class MarkPresentTests(AttendanceTestCase):
+
+    def test_repeated_mark_updates_the_same_record(self):
+        student = self.make_student("student@example.com")
+        window = self.make_window()
+
+        first, created = mark_present(student, window, self.teacher)
+        self.assertTrue(created)
+        second, created = mark_present(student, window, student)
+        self.assertFalse(created)
+
+        self.assertEqual(first.id, second.id)
+        records = Attendance_Record.objects.filter(user=student, attendance_window=window)
+        self.assertEqual(records.count(), 1)
+        record = records.get()
+        self.assertEqual(record.status, Attendance_Record.Status.PRESENT)
+        self.assertEqual(record.marked_by_id, student.id)
+
+    def test_mark_overrides_an_absence(self):
+        student = self.make_student("student@example.com")
+        window = self.make_window()
+        Attendance_Record.objects.create(
+            user=student,
+            attendance_window=window,
+            status=Attendance_Record.Status.ABSENT,
+            marked_by=self.teacher,
+        )
+
+        _, created = mark_present(student, window, self.teacher)
+
+        self.assertFalse(created)
+        record = Attendance_Record.objects.get(user=student, attendance_window=window)
+        self.assertEqual(record.status, Attendance_Record.Status.PRESENT)
+
+    def test_mark_many_counts_created_and_updated(self):
+        students = [self.make_student(f"student{i}@example.com") for i in range(3)]
+        window = self.make_window()
+        mark_present(students[0], window, self.teacher)
+
+        created, updated = mark_present_many([s.id for s in students], window, self.teacher)
+        self.assertEqual((created, updated), (2, 1))
+
+        created, updated = mark_present_many([s.id for s in students], window, self.teacher)
+        self.assertEqual((created, updated), (0, 3))
+        self.assertEqual(Attendance_Record.objects.filter(attendance_window=window).count(), 3)
+
+    def test_mark_many_with_no_users(self):
+        self.assertEqual(mark_present_many([], self.make_window(), self.teacher), (0, 0))
@@ -0,0 +1,97 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from ..models import Attendance_Record, Subject, User
+from ..utils.attendance_marks import mark_present
+from ..utils.window_closer import close_finished_windows
+from .base import AttendanceTestCase
+
+
+class CloseFinishedWindowsTests(AttendanceTestCase):
+
+    def make_finished_window(self, **fields):
+        return self.make_window(start_time=timezone.now() - timedelta(hours=1), duration=60, **fields)
+
+    def absences(self, window):
+        return Attendance_Record.objects.filter(
+            attendance_window=window, status=Attendance_Record.Status.ABSENT
+        )
+
+    def test_only_unmarked_active_students_are_marked_absent(self):
+        window = self.make_finished_window()
+        present = self.make_student("present@example.com")
+        missing = self.make_student("missing@example.com")
+        self.make_student("inactive@example.com", is_active=False)
+        self.make_student("deleted@example.com", is_deleted=True)
+        self.make_student("other@example.com", batch=self.other_batch)
+        User.objects.create_user("ta@example.com", role=User.Role.TEACHER, batch=self.batch)
+        mark_present(present, window, self.teacher)
+
+        self.assertEqual(close_finished_windows(), (1, 1))
+
+        statuses = dict(
+            Attendance_Record.objects.filter(attendance_window=window).values_list(
+                "user_id", "status"
+            )
+        )
+        self.assertEqual(
+            statuses,
+            {
+                present.id: Attendance_Record.Status.PRESENT,
+                missing.id: Attendance_Record.Status.ABSENT,
+            },
+        )
+        self.assertEqual(self.absences(window).get().marked_by_id, self.teacher.id)
+        window.refresh_from_db()
+        self.assertFalse(window.is_active)
+        self.assertIsNotNone(window.closed_at)
+
+        # Closed windows are not picked up again.
+        self.assertEqual(close_finished_windows(), (0, 0))
+
+    def test_windows_closed_by_a_teacher_are_closed_early(self):
+        window = self.make_window(is_active=False, opened_at=timezone.now())
+        self.make_student("student@example.com")
+
+        self.assertEqual(close_finished_windows(), (1, 1))
+        window.refresh_from_db()
+        self.assertIsNotNone(window.closed_at)
+
+    def test_windows_that_never_opened_are_left_alone(self):
+        window = self.make_window(is_active=False)
+        self.make_student("student@example.com")
+
+        self.assertEqual(close_finished_windows(), (0, 0))
+        window.refresh_from_db()
+        self.assertIsNone(window.closed_at)
+        self.assertFalse(self.absences(window).exists())
+
+    def test_open_windows_are_left_alone(self):
+        window = self.make_window()
+        self.make_student("student@example.com")
+
+        self.assertEqual(close_finished_windows(), (0, 0))
+        window.refresh_from_db()
+        self.assertTrue(window.is_active)
+        self.assertIsNone(window.closed_at)
+        self.assertFalse(Attendance_Record.objects.filter(attendance_window=window).exists())
+
+    def test_absences_fall_back_to_the_subject_faculty(self):
+        window = self.make_finished_window(last_interacted_by=None)
+        student = self.make_student("student@example.com")
+
+        close_finished_windows()
+
+        absence = self.absences(window).get()
+        self.assertEqual(absence.marked_by_id, self.teacher.id)
+        self.assertNotEqual(absence.marked_by_id, student.id)
+
+    def test_absences_without_a_teacher_are_credited_to_nobody(self):
+        subject = Subject.objects.create(batch=self.batch, name="Physics")
+        window = self.make_finished_window(target_subject=subject, last_interacted_by=None)
+        self.make_student("student@example.com")
+
+        close_finished_windows()
+
+        self.assertIsNone(self.absences(window).get().marked_by_id)
@@ -0,0 +1,87 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from ..utils.window_registry import WindowRegistry, window_end
+from ..views.attendance import check_window_open
+from .base import AttendanceTestCase
+
+
+class WindowRegistryTests(AttendanceTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.registry = WindowRegistry(ttl=60)
+
+    def register(self, window):
+        self.registry.register(window, self.registry.version())
+
+    def test_open_window_is_served(self):
+        window = self.make_window()
+        self.register(window)
+
+        self.assertEqual(self.registry.get(window.id).id, window.id)
+        self.assertEqual(self.registry.get_active(self.batch.id, self.subject.id).id, window.id)
+
+    def test_closed_window_is_not_served(self):
+        window = self.make_window()
+        self.register(window)
+
+        window.is_active = False
+        window.save(update_fields=["is_active"])
+        self.registry.invalidate(window)
+
+        self.assertIsNone(self.registry.get(window.id))
+        self.assertIsNone(self.registry.get_active(self.batch.id, self.subject.id))
+
+    def test_expired_window_is_not_served(self):
+        window = self.make_window(duration=60)
+        self.register(window)
+
+        later = window_end(window) + timedelta(seconds=1)
+        with mock.patch("django.utils.timezone.now", return_value=later):
+            self.assertIsNone(self.registry.get(window.id))
+            self.assertIsNone(self.registry.get_active(self.batch.id, self.subject.id))
+
+    def test_inactive_or_finished_windows_are_not_registered(self):
+        inactive = self.make_window(is_active=False)
+        # Windows are unique per (batch, subject, date).
+        finished = self.make_window(
+            start_time=timezone.now() - timedelta(days=1),
+            date=timezone.localdate() - timedelta(days=1),
+            duration=60,
+        )
+        self.register(inactive)
+        self.register(finished)
+
+        self.assertIsNone(self.registry.get(inactive.id))
+        self.assertIsNone(self.registry.get(finished.id))
+
+    def test_window_closed_during_the_fetch_is_not_registered(self):
+        window = self.make_window()
+        version = self.registry.version()
+        self.registry.invalidate(window)
+
+        self.registry.register(window, version)
+
+        self.assertIsNone(self.registry.get(window.id))
+
+
+class CheckWindowOpenTests(AttendanceTestCase):
+
+    def test_open_window(self):
+        with self.assertNumQueries(0):
+            self.assertIsNone(check_window_open(self.make_window()))
+
+    def test_expired_window_is_reported_closed_without_a_write(self):
+        window = self.make_window(start_time=timezone.now() - timedelta(hours=1), duration=60)
+
+        with self.assertNumQueries(0):
+            response = check_window_open(window)
+
+        self.assertEqual(response.status_code, 400)
+        window.refresh_from_db()
+        # Left to the window closer.
+        self.assertTrue(window.is_active)
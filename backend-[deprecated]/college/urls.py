@@ -5,7 +5,12 @@ from .views.university import UniversityListCreateView, UniversityDetailView
 from .views.course import CourseListCreateView, CourseDetailView
 from .views.batch import BatchListCreateView, BatchDetailView
 from .views.subject import SubjectListCreateView, SubjectDetailView
-from .views.attendance import AttendanceWindowView, AttendanceRecordView
+from .views.attendance import (
+    AttendanceWindowView,
+    AttendanceRecordView,
+    AttendanceRecordPrecheckView,
+    AttendanceGroupRecordView,
+)
 from .views.analytics import AttendanceAnalyticsView, AttendanceMonthlyPercentageView, StudentCalendarView
 from .views.announcement import (
     AnnouncementListCreateView,
@@ -15,6 +20,7 @@ from .views.announcement import (
     AnnouncementByUniversityView,
 )
 from .views.announcement_upload import AnnouncementMediaUploadView
+from .views.health import ReadinessView
 
 urlpatterns = [
     #
@@ -50,6 +56,12 @@ urlpatterns = [
     path(
         "attendance/record/", AttendanceRecordView.as_view(), name="attendance-record"
     ),
+    path(
+        "attendance/record/precheck/", AttendanceRecordPrecheckView.as_view(), name="attendance-record-precheck"
+    ),
+    path(
+        "attendance/record/group/", AttendanceGroupRecordView.as_view(), name="attendance-record-group"
+    ),
     path(
         "attendance/analytics/", AttendanceAnalyticsView.as_view(), name="attendance-analytics"
     ),
@@ -77,4 +89,10 @@ urlpatterns = [
     path("announcements/batch/<int:batch_id>/", AnnouncementByBatchView.as_view(), name="announcements-by-batch"),
     path("announcements/university/<int:university_id>/", AnnouncementByUniversityView.as_view(), name="announcements-by-university"),
     path("announcements/upload-media/", AnnouncementMediaUploadView.as_view(), name="announcement-media-upload"),
+    #
+    #
+    # ---- HEALTH ENDPOINTS :
+    #
+    #
+    path("health/ready", ReadinessView.as_view(), name="health-ready"),
 ]
@@ -0,0 +1,78 @@
+"""
+Writes of PRESENT attendance marks.
+
+Records are unique per (user, window), so a mark is one
+INSERT ... ON CONFLICT DO UPDATE instead of a read and then a write, and
+concurrent retries of the same mark cannot create duplicates. In RETURNING,
+``xmax = 0`` holds only for rows the statement inserted.
+"""
+
+from django.db import connection
+from django.utils import timezone
+
+from ..models import Attendance_Record
+
+RECORDS = Attendance_Record._meta.db_table
+
+MARK_SQL = f"""
+INSERT INTO {RECORDS} AS r (user_id, attendance_window_id, status, created_at, date, marked_by_id)
+VALUES (%(user)s, %(window)s, %(status)s, %(now)s, %(date)s, %(marked_by)s)
+ON CONFLICT (user_id, attendance_window_id) DO UPDATE
+SET status = EXCLUDED.status, marked_by_id = EXCLUDED.marked_by_id
+RETURNING r.id, r.created_at, r.date, (r.xmax = 0)
+"""
+
+MARK_MANY_SQL = f"""
+INSERT INTO {RECORDS} AS r (user_id, attendance_window_id, status, created_at, date, marked_by_id)
+SELECT user_id, %(window)s, %(status)s, %(now)s, %(date)s, %(marked_by)s
+FROM unnest(%(users)s::bigint[]) AS user_id
+ON CONFLICT (user_id, attendance_window_id) DO UPDATE
+SET status = EXCLUDED.status, marked_by_id = EXCLUDED.marked_by_id
+RETURNING (r.xmax = 0)
+"""
+
+
+def _params(window, marked_by):
+    return {
+        "window": window.id,
+        "status": Attendance_Record.Status.PRESENT,
+        "now": timezone.now(),
+        "date": timezone.localdate(),
+        "marked_by": marked_by.id,
+    }
+
+
+def mark_present(user, window, marked_by):
+    """
+    Returns:
+        (Attendance_Record, created), the record built from the returned row
+        and the given objects without another query
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(MARK_SQL, {**_params(window, marked_by), "user": user.id})
+        record_id, created_at, date, created = cursor.fetchone()
+
+    record = Attendance_Record(
+        id=record_id,
+        user=user,
+        attendance_window=window,
+        status=Attendance_Record.Status.PRESENT,
+        created_at=created_at,
+        date=date,
+        marked_by=marked_by,
+    )
+    return record, created
+
+
+def mark_present_many(user_ids, window, marked_by):
+    """
+    Returns:
+        (records created, records updated)
+    """
+    if not user_ids:
+        return 0, 0
+    with connection.cursor() as cursor:
+        cursor.execute(MARK_MANY_SQL, {**_params(window, marked_by), "users": list(user_ids)})
+        inserted = [row[0] for row in cursor.fetchall()]
+    created = sum(inserted)
+    return created, len(inserted) - created
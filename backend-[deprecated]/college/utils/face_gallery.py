@@ -0,0 +1,201 @@
+"""
+Per-user galleries of face templates.
+
+A user is enrolled with one template from their profile picture. Confident
+attendance captures that still look different from every template (another
+angle, lighting, glasses) are added, up to FACE_GALLERY_SIZE, replacing the
+oldest capture once the gallery is full. Confidence is measured against the
+enrollment template only, so captures can never pull the gallery away from
+the enrolled face step by step. The FaceEmbedding row holds the centroid of
+the current-version templates, so the HNSW index and the roster matrices
+keep one vector per person.
+
+Marks only queue their capture (queue_capture); a daemon thread applies
+the queue every FACE_GALLERY_FLUSH_SECONDS and then invalidates each
+affected batch roster once, so a class-start spike neither writes galleries
+on the request path nor reloads the roster after every mark.
+"""
+
+import logging
+import queue
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from services.face_matching import centroid, distance_matrix
+from services.face_recognition import embedding_version
+
+from ..models import FaceEmbedding, FaceTemplate, User
+from .roster_cache import invalidate as invalidate_roster
+
+logger = logging.getLogger(__name__)
+
+
+def enroll(user, embedding):
+    """Replaces the user's gallery with a single enrollment template."""
+    version = embedding_version()
+    with transaction.atomic():
+        face, _ = FaceEmbedding.objects.update_or_create(
+            user=user,
+            defaults={"embedding": embedding, "version": version},
+        )
+        face.templates.all().delete()
+        FaceTemplate.objects.create(
+            face=face,
+            embedding=embedding,
+            version=version,
+            source=FaceTemplate.Source.ENROLLMENT,
+        )
+    return face
+
+
+def add_template(user_id, embedding):
+    """
+    Adds an attendance capture to the user's gallery if it is within
+    FACE_GALLERY_ADD_DISTANCE of their enrollment template and at least
+    FACE_GALLERY_MIN_NOVELTY from every template already there, and moves
+    their centroid. Sends no signals: the caller invalidates the roster.
+
+    Returns:
+        True if the gallery changed
+    """
+    current = embedding_version()
+    embedding = np.asarray(embedding, dtype=np.float32)
+    size = max(1, getattr(settings, "FACE_GALLERY_SIZE", 5))
+    add_distance = getattr(settings, "FACE_GALLERY_ADD_DISTANCE", 0.6)
+    min_novelty = getattr(settings, "FACE_GALLERY_MIN_NOVELTY", 0.3)
+
+    with transaction.atomic():
+        face = FaceEmbedding.objects.select_for_update().filter(user_id=user_id).first()
+        # Galleries only grow for the live slot; a shadow-slot match would
+        # move a centroid nobody searches.
+        if face is None or face.embedding is None or face.version != current:
+            return False
+
+        templates = list(face.templates.filter(version=current).order_by("created_at", "id"))
+        if not templates:
+            # Re-embedded faces start with their embedding as the only template.
+            templates.append(
+                FaceTemplate.objects.create(
+                    face=face,
+                    embedding=face.embedding,
+                    version=current,
+                    source=FaceTemplate.Source.ENROLLMENT,
+                )
+            )
+
+        enrolled = [t.embedding for t in templates if t.source == FaceTemplate.Source.ENROLLMENT]
+        if not enrolled or distance_matrix(embedding[None, :], enrolled).min() > add_distance:
+            return False
+
+        vectors = np.asarray([template.embedding for template in templates], dtype=np.float32)
+        if distance_matrix(embedding[None, :], vectors).min() < min_novelty:
+            return False
+
+        if len(templates) >= size:
+            captures = [t for t in templates if t.source == FaceTemplate.Source.ATTENDANCE]
+            if not captures:
+                return False
+            captures[0].delete()
+            templates.remove(captures[0])
+
+        templates.append(
+            FaceTemplate.objects.create(
+                face=face,
+                embedding=embedding.tolist(),
+                version=current,
+                source=FaceTemplate.Source.ATTENDANCE,
+            )
+        )
+        # Templates of retired versions can never be compared again.
+        face.templates.exclude(version__in=[face.version, face.next_version]).delete()
+
+        # update() rather than save(): the post_save signal would reload the
+        # batch roster once per capture.
+        FaceEmbedding.objects.filter(pk=face.pk).update(
+            embedding=centroid([template.embedding for template in templates]).tolist(),
+            updated_at=timezone.now(),
+        )
+    return True
+
+
+class GalleryWriter:
+    """Applies queued captures in the background, a batch at a time."""
+
+    def __init__(self, interval=30.0, max_pending=1000):
+        self.interval = interval
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._thread = None
+
+        self.dropped = 0
+
+    def submit(self, user_id, embedding):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((user_id, np.asarray(embedding, dtype=np.float32)))
+        except queue.Full:
+            # Losing a capture only delays a gallery update.
+            with self._lock:
+                self.dropped += 1
+
+    def flush(self):
+        """
+        Applies every queued capture, then invalidates each batch roster
+        whose galleries changed.
+
+        Returns:
+            number of galleries changed
+        """
+        changed = set()
+        while True:
+            try:
+                user_id, embedding = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                if add_template(user_id, embedding):
+                    changed.add(user_id)
+            except Exception:
+                logger.exception("Could not add a face template for user %s", user_id)
+
+        if changed:
+            batch_ids = set(
+                User.objects.filter(pk__in=changed).values_list("batch_id", flat=True)
+            )
+            for batch_id in batch_ids:
+                invalidate_roster(batch_id)
+        return len(changed)
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="face-gallery", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Face gallery flush failed")
+            finally:
+                close_old_connections()
+
+
+gallery_writer = GalleryWriter(
+    interval=getattr(settings, "FACE_GALLERY_FLUSH_SECONDS", 30.0),
+    max_pending=getattr(settings, "FACE_GALLERY_MAX_PENDING", 1000),
+)
+
+
+def queue_capture(user_id, embedding):
+    """Queues a confidently matched capture for the user's gallery."""
+    gallery_writer.submit(user_id, embedding)
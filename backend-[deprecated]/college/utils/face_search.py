@@ -0,0 +1,96 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.functions import Cast
+from pgvector import HalfVector
+from pgvector.django import HalfVectorField, L2Distance
+
+from services.face_recognition import embedding_version
+
+from ..models import FaceEmbedding, FaceTemplate
+
+
+def half_embedding():
+    """``embedding::halfvec(128)``, the expression the half-precision index is on."""
+    return Cast("embedding", HalfVectorField(dimensions=128))
+
+
+def matchable_faces():
+    """
+    Faces that can be matched: the partial HNSW index condition, embeddings
+    of the current version, and users that are active and not deleted.
+    """
+    return FaceEmbedding.objects.filter(
+        embedding__isnull=False,
+        version=embedding_version(),
+        user__is_active=True,
+        user__is_deleted=False,
+    )
+
+
+def _rescore_with_templates(faces, encoding_vector):
+    """Lowers each face's distance to that of its closest current-version template."""
+    by_id = {face.pk: face for face in faces}
+    templates = (
+        FaceTemplate.objects.filter(face_id__in=list(by_id), version=embedding_version())
+        .annotate(distance=L2Distance("embedding", encoding_vector))
+        .values_list("face_id", "distance")
+    )
+    for face_id, distance in templates:
+        face = by_id[face_id]
+        face.distance = min(face.distance, distance)
+    return min(faces, key=lambda face: face.distance)
+
+
+def closest_faces(encoding_vector, limit, queryset=None, ef_search=None):
+    """
+    The ``limit`` faces closest to ``encoding_vector`` by centroid, each
+    annotated with its full-precision ``distance``, closest first.
+
+    The half-precision index picks the FACE_SEARCH_RESCORE_K (at least
+    ``limit``) nearest candidates and they are re-ranked by their
+    full-precision distance, which is the one reported.
+
+    ``ef_search`` (default FACE_SEARCH_EF_SEARCH) is the HNSW candidate list
+    size for this query only: higher means better recall and slower search.
+    """
+    if queryset is None:
+        queryset = matchable_faces()
+    if ef_search is None:
+        ef_search = getattr(settings, "FACE_SEARCH_EF_SEARCH", 40)
+
+    rescore_k = max(limit, getattr(settings, "FACE_SEARCH_RESCORE_K", 10))
+    candidates = queryset.order_by(
+        L2Distance(half_embedding(), HalfVector(encoding_vector))
+    ).values("pk")[:rescore_k]
+
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                # SET LOCAL ends with the transaction, so pooled connections
+                # never leak the setting into other requests.
+                cursor.execute(f"SET LOCAL hnsw.ef_search = {int(ef_search)}")
+        return list(
+            FaceEmbedding.objects.filter(pk__in=candidates)
+            .annotate(distance=L2Distance("embedding", encoding_vector))
+            .order_by("distance")[:limit]
+        )
+
+
+def nearest_user(encoding_vector, queryset=None, ef_search=None):
+    """
+    Returns the closest face (annotated with ``distance``; its pk is the
+    user id) or None.
+
+    The index ranks faces by their centroid (see closest_faces()); the
+    FACE_GALLERY_CANDIDATES closest are then compared with their gallery
+    templates too.
+    """
+    faces = closest_faces(
+        encoding_vector,
+        getattr(settings, "FACE_GALLERY_CANDIDATES", 3),
+        queryset=queryset,
+        ef_search=ef_search,
+    )
+    if not faces:
+        return None
+    return _rescore_with_templates(faces, encoding_vector)
@@ -0,0 +1,235 @@
+"""
+Process-local cache of each batch's roster embeddings.
+
+Matching a face against the students of a window's batch is one
+matrix-vector product over a contiguous matrix of centroids instead of a
+Postgres query, followed by a comparison with the gallery templates of the
+closest few students. Every batch has a version number in Django's cache; the
+User and FaceEmbedding signals in college.signals bump it when a
+student's embedding, batch or status changes, and a process reloads its copy the next time it
+sees a newer version. With the default LocMem cache, versions are only
+seen by the process that bumped them, so entries also expire after
+FACE_ROSTER_CACHE_TTL seconds.
+"""
+
+import threading
+import time
+from collections import namedtuple
+from dataclasses import dataclass
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from services.face_matching import distance_matrix, gallery_distance_matrix
+from services.face_recognition import embedding_version
+
+from ..models import FaceEmbedding, FaceTemplate, User
+
+_VERSION_KEY = "face-roster-version:{}"
+
+# ``pk`` and ``distance`` like a User annotated by an L2Distance query.
+RosterMatch = namedtuple("RosterMatch", ["pk", "name", "distance"])
+
+
+@dataclass(frozen=True)
+class Roster:
+    batch_id: int
+    version: int
+    loaded_at: float
+    user_ids: np.ndarray  # int64 (n,), ascending
+    names: tuple
+    embeddings: np.ndarray  # float32 or float16 (n, 128), C-contiguous
+    # Every student's centroid followed by their templates; student i
+    # starts at row gallery_starts[i].
+    gallery: np.ndarray  # same dtype, (g, 128)
+    gallery_starts: np.ndarray  # int64 (n,)
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def distances(self, encoding):
+        """
+        Returns:
+            np.ndarray (n,) of L2 distances from ``encoding`` to each student
+        """
+        if not len(self):
+            return np.empty(0, dtype=np.float32)
+        return distance_matrix(np.asarray(encoding, dtype=np.float32)[None, :], self.embeddings)[0]
+
+    def gallery_distances(self, faces):
+        """
+        Returns:
+            np.ndarray (len(faces), n): distance from each face to the
+            closest centroid or template of each student
+        """
+        return gallery_distance_matrix(faces, self.gallery, self.gallery_starts)
+
+    def _gallery_rows(self, index):
+        end = self.gallery_starts[index + 1] if index + 1 < len(self) else len(self.gallery)
+        return self.gallery[self.gallery_starts[index]:end]
+
+    def gallery_of(self, user_id):
+        """
+        Returns:
+            the student's centroid and templates (k, 128), or None if they
+            are not in the roster
+        """
+        index = int(np.searchsorted(self.user_ids, user_id))
+        if index < len(self) and self.user_ids[index] == user_id:
+            return self._gallery_rows(index)
+        return None
+
+    def closest(self, encoding, candidates=None):
+        """
+        Ranks students by centroid, then compares the ``candidates``
+        (default FACE_GALLERY_CANDIDATES) closest with all their templates.
+
+        Returns:
+            RosterMatch of the closest student, or None
+        """
+        if not len(self):
+            return None
+        if candidates is None:
+            candidates = getattr(settings, "FACE_GALLERY_CANDIDATES", 3)
+        encoding = np.asarray(encoding, dtype=np.float32)[None, :]
+        distances = self.distances(encoding[0])
+
+        count = min(max(1, candidates), len(self))
+        best_index, best_distance = None, None
+        for index in np.argpartition(distances, count - 1)[:count]:
+            distance = float(distance_matrix(encoding, self._gallery_rows(index)).min())
+            if best_distance is None or distance < best_distance:
+                best_index, best_distance = int(index), distance
+        return RosterMatch(int(self.user_ids[best_index]), self.names[best_index], best_distance)
+
+
+def _version(batch_id):
+    return cache.get(_VERSION_KEY.format(batch_id), 0)
+
+
+def bump_version(key):
+    """Increments the version counter at ``key`` in the default cache."""
+    # add() is a no-op when the key exists, so incr() never hits a missing key.
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def invalidate(batch_id):
+    """Marks the cached roster of ``batch_id`` stale in every process."""
+    if batch_id is None:
+        return
+    bump_version(_VERSION_KEY.format(batch_id))
+
+
+def _matrix_dtype():
+    # Half-precision storage halves the matrices; distances are still
+    # computed in float32.
+    if getattr(settings, "FACE_EMBEDDING_STORAGE", "vector") == "halfvec":
+        return np.float16
+    return np.float32
+
+
+def _matrix(vectors):
+    # reshape(0, -1) is ambiguous, so the width is spelled out (VectorField(128)).
+    return np.ascontiguousarray(
+        np.asarray(vectors, dtype=_matrix_dtype()).reshape(len(vectors), 128)
+    )
+
+
+def _load(batch_id, version):
+    current = embedding_version()
+    faces = (
+        FaceEmbedding.objects.filter(
+            user__batch_id=batch_id,
+            user__role=User.Role.STUDENT,
+            user__is_active=True,
+            user__is_deleted=False,
+        )
+        .filter(
+            Q(embedding__isnull=False, version=current)
+            | Q(next_embedding__isnull=False, next_version=current)
+        )
+        .select_related("user")
+        .only("embedding", "version", "next_embedding", "next_version", "user__id", "user__name")
+        .order_by("user_id")
+    )
+    rows = [(face.user_id, face.user.name, face.embedding_for(current)) for face in faces]
+
+    templates = {}
+    for face_id, embedding in (
+        FaceTemplate.objects.filter(face_id__in=[row[0] for row in rows], version=current)
+        .order_by("face_id", "id")
+        .values_list("face_id", "embedding")
+    ):
+        templates.setdefault(face_id, []).append(embedding)
+
+    gallery, starts = [], []
+    for row in rows:
+        starts.append(len(gallery))
+        gallery.append(row[2])
+        gallery.extend(templates.get(row[0], ()))
+
+    return Roster(
+        batch_id=batch_id,
+        version=version,
+        loaded_at=time.monotonic(),
+        user_ids=np.asarray([row[0] for row in rows], dtype=np.int64),
+        names=tuple(row[1] for row in rows),
+        embeddings=_matrix([row[2] for row in rows]),
+        gallery=_matrix(gallery),
+        gallery_starts=np.asarray(starts, dtype=np.int64),
+    )
+
+
+class RosterCache:
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._rosters = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.loads = 0
+
+    def get(self, batch_id):
+        version = _version(batch_id)
+        roster = self._rosters.get(batch_id)
+        if (
+            roster is not None
+            and roster.version == version
+            and time.monotonic() - roster.loaded_at < self.ttl
+        ):
+            with self._lock:
+                self.hits += 1
+            return roster
+
+        roster = _load(batch_id, version)
+        with self._lock:
+            self._rosters[batch_id] = roster
+            self.loads += 1
+        return roster
+
+    def clear(self):
+        with self._lock:
+            self._rosters.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "batches": len(self._rosters),
+                "students": sum(len(roster) for roster in self._rosters.values()),
+                "bytes": sum(
+                    roster.embeddings.nbytes + roster.gallery.nbytes
+                    for roster in self._rosters.values()
+                ),
+                "hits": self.hits,
+                "loads": self.loads,
+            }
+
+
+roster_cache = RosterCache(ttl=getattr(settings, "FACE_ROSTER_CACHE_TTL", 300))
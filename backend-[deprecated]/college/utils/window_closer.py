@@ -0,0 +1,97 @@
+"""
+Closing of finished attendance windows.
+
+A window is finished once it has been opened and then either a teacher
+closed it or its start_time + duration has passed; windows saved inactive
+that never opened are left alone. Closing it marks it inactive and gives
+every active student of its batch without a record an ABSENT one, credited
+to the teacher who last opened or closed the window (else the subject's
+faculty, else nobody), so absences are rows that
+analytics can count instead of gaps they have to infer. Each pass is one
+statement per chunk of windows; SKIP LOCKED lets several closers run, and
+the (user, window) unique constraint turns existing marks into no-ops.
+"""
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ..models import Attendance_Record, Attendance_Window, Subject, User
+
+WINDOWS = Attendance_Window._meta.db_table
+RECORDS = Attendance_Record._meta.db_table
+USERS = User._meta.db_table
+SUBJECTS = Subject._meta.db_table
+
+CLOSE_SQL = f"""
+WITH finished AS (
+    SELECT id FROM {WINDOWS}
+    WHERE closed_at IS NULL
+      AND opened_at IS NOT NULL
+      AND (NOT is_active OR start_time + make_interval(secs => duration) <= %(now)s)
+    ORDER BY id
+    LIMIT %(limit)s
+    FOR UPDATE SKIP LOCKED
+),
+closed AS (
+    UPDATE {WINDOWS} AS w
+    SET is_active = FALSE, closed_at = %(now)s
+    FROM finished
+    WHERE w.id = finished.id
+    RETURNING w.id, w.target_batch_id, w.target_subject_id, w.date, w.last_interacted_by_id
+),
+absent AS (
+    INSERT INTO {RECORDS} (user_id, attendance_window_id, status, created_at, date, marked_by_id)
+    SELECT u.id, closed.id, %(absent)s, %(now)s, closed.date,
+           COALESCE(closed.last_interacted_by_id, s.faculty_id)
+    FROM closed
+    JOIN {USERS} AS u ON u.batch_id = closed.target_batch_id
+    LEFT JOIN {SUBJECTS} AS s ON s.id = closed.target_subject_id
+    WHERE u.role = %(student)s
+      AND u.is_active
+      AND NOT u.is_deleted
+    ON CONFLICT (user_id, attendance_window_id) DO NOTHING
+    RETURNING 1
+)
+SELECT (SELECT COUNT(*) FROM closed), (SELECT COUNT(*) FROM absent)
+"""
+
+NEXT_END_SQL = f"""
+SELECT MIN(start_time + make_interval(secs => duration))
+FROM {WINDOWS}
+WHERE closed_at IS NULL AND is_active
+"""
+
+
+def close_finished_windows(now=None, limit=100):
+    """
+    Closes every finished window, ``limit`` windows per statement.
+
+    Returns:
+        (windows closed, ABSENT records created)
+    """
+    now = now or timezone.now()
+    params = {
+        "now": now,
+        "limit": limit,
+        "absent": Attendance_Record.Status.ABSENT,
+        "student": User.Role.STUDENT,
+    }
+    windows = absences = 0
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(CLOSE_SQL, params)
+            closed, created = cursor.fetchone()
+        windows += closed
+        absences += created
+        if closed < limit:
+            return windows, absences
+
+
+def next_window_end():
+    """
+    Returns:
+        when the next open window ends (may be in the past), or None
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(NEXT_END_SQL)
+        return cursor.fetchone()[0]
@@ -0,0 +1,182 @@
+"""
+Registry of open attendance windows.
+
+While a class is marking attendance every request reads the same window
+row. Open windows are kept in Django's cache, keyed by id and by
+(batch, subject), with a timeout that ends with the window, and in a
+per-process copy in front of it. Whether a window is open is recomputed
+from start_time + duration on every lookup, so an entry stops being
+served exactly at the window end. AttendanceWindowView.post bumps a
+version in the cache that makes every process drop its copy.
+
+With the default LocMem cache the version is only seen by the process that
+bumped it, so per-process copies are also dropped after
+ATTENDANCE_WINDOW_CACHE_TTL seconds, which bounds how long a window closed
+early keeps being served by other workers.
+
+Only open windows are registered; a miss falls back to the database,
+which also tells the caller why a window cannot be used.
+"""
+
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils import timezone
+
+from .roster_cache import bump_version
+
+_VERSION_KEY = "attendance-window-registry-version"
+_WINDOW_KEY = "attendance-window:{}"
+_PAIR_KEY = "attendance-window:{}:{}"
+
+
+def window_end(window):
+    return window.start_time + timedelta(seconds=int(window.duration))
+
+
+def is_open(window, now=None):
+    return bool(window.is_active) and (now or timezone.now()) <= window_end(window)
+
+
+def _as_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _cache_is_shared():
+    return not isinstance(caches["default"], LocMemCache)
+
+
+class WindowRegistry:
+
+    def __init__(self, ttl=5):
+        self.ttl = ttl
+        self._windows = {}  # window id -> (Attendance_Window, loaded_at)
+        self._pairs = {}  # (batch id, subject id) -> window id
+        self._version = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.loads = 0
+
+    def version(self):
+        """
+        Read before fetching a window from the database and passed to
+        register(), so a close that commits in between is not undone.
+        """
+        return cache.get(_VERSION_KEY, 0)
+
+    def _sync(self):
+        version = self.version()
+        if version != self._version:
+            with self._lock:
+                self._windows.clear()
+                self._pairs.clear()
+                self._version = version
+
+    def _keep(self, window):
+        with self._lock:
+            self._windows[window.id] = (window, time.monotonic())
+            self._pairs[(window.target_batch_id, window.target_subject_id)] = window.id
+
+    def _local(self, window_id):
+        entry = self._windows.get(window_id)
+        if entry is None:
+            return None
+        window, loaded_at = entry
+        if time.monotonic() - loaded_at >= self.ttl:
+            with self._lock:
+                self._windows.pop(window_id, None)
+            return None
+        return window
+
+    def get(self, window_id):
+        """
+        Returns:
+            the Attendance_Window if it is registered and open, else None
+        """
+        window_id = _as_id(window_id)
+        if window_id is None:
+            return None
+        self._sync()
+
+        window = self._local(window_id)
+        if window is None:
+            window = cache.get(_WINDOW_KEY.format(window_id))
+            if window is None:
+                return None
+            self._keep(window)
+
+        if not is_open(window):
+            with self._lock:
+                self._windows.pop(window_id, None)
+            return None
+        with self._lock:
+            self.hits += 1
+        return window
+
+    def get_active(self, batch_id, subject_id):
+        """
+        Returns:
+            the open window of (batch, subject), or None if none is registered
+        """
+        pair = (_as_id(batch_id), _as_id(subject_id))
+        if None in pair:
+            return None
+        self._sync()
+
+        window_id = self._pairs.get(pair)
+        if window_id is None:
+            window_id = cache.get(_PAIR_KEY.format(*pair))
+            if window_id is None:
+                return None
+        return self.get(window_id)
+
+    def register(self, window, version):
+        """
+        Registers a window read from the database, if it is open and no
+        invalidation happened since ``version`` was read (see version()).
+        """
+        timeout = math.ceil((window_end(window) - timezone.now()).total_seconds())
+        if not window.is_active or timeout <= 0 or self.version() != version:
+            return
+        if not _cache_is_shared():
+            # The "shared" entry is as process-local as our own copy.
+            timeout = min(timeout, math.ceil(self.ttl))
+        keys = {
+            _WINDOW_KEY.format(window.id): window,
+            _PAIR_KEY.format(window.target_batch_id, window.target_subject_id): window.id,
+        }
+        cache.set_many(keys, timeout=timeout)
+        if self.version() != version:
+            # Invalidated while we were writing; take the entry back out.
+            cache.delete_many(list(keys))
+            return
+        self._keep(window)
+        with self._lock:
+            self.loads += 1
+
+    def invalidate(self, window):
+        """Forgets ``window`` in the shared cache and in every process."""
+        cache.delete_many(
+            [
+                _WINDOW_KEY.format(window.id),
+                _PAIR_KEY.format(window.target_batch_id, window.target_subject_id),
+            ]
+        )
+        bump_version(_VERSION_KEY)
+        self._sync()
+
+    def stats(self):
+        with self._lock:
+            return {"windows": len(self._windows), "hits": self.hits, "loads": self.loads}
+
+
+window_registry = WindowRegistry(ttl=getattr(settings, "ATTENDANCE_WINDOW_CACHE_TTL", 5))
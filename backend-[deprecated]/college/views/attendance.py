@@ -1,22 +1,132 @@
-from pgvector.django import L2Distance
+import logging
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework import serializers, status
 from django.shortcuts import get_object_or_404
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
-from datetime import timedelta
 from shapely.geometry import Point, Polygon
 from django.db import transaction
+from django.conf import settings
 
+from college.utils.attendance_marks import mark_present, mark_present_many
 from college.utils.check_roles import check_allow_roles
-from services.face_recognition import has_face
-from ..models import Batch, Subject, Attendance_Window, User, Attendance_Record
+from college.utils.face_gallery import queue_capture
+from college.utils.face_search import nearest_user
+from college.utils.roster_cache import RosterMatch, roster_cache
+from college.utils.window_registry import window_end, window_registry
+from services.face_matching import assign_one_to_one, distance_matrix
+from services.face_quality import (
+    REASON_INFERENCE_UNAVAILABLE,
+    REASON_MESSAGES,
+    REASON_NO_FACE,
+    REASON_UNREADABLE,
+)
+from services.face_recognition import (
+    analyze_group_photos,
+    embedding_version,
+    iter_burst,
+    read_burst_frames,
+)
+from ..models import Batch, Subject, Attendance_Window, User, Attendance_Record, FaceEmbedding, FaceTemplate
 from ..serializers import Attendance_WindowSerializer, AttendanceRecordSerializer
 
+logger = logging.getLogger(__name__)
+
 FACE_MATCH_THRESHOLD = 0.95
 
 
+def check_window_open(window):
+    """
+    Returns None if attendance can be marked in the window,
+    or a Response object if not.
+    """
+    # Check active window
+    if not window.is_active:
+        return Response(
+            {"message": "Attendance window is not active"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    # Check time validity. Expired windows are marked inactive by
+    # `manage.py close_attendance_windows`, not on this read path.
+    if timezone.now() > window_end(window):
+        return Response(
+            {"message": "Attendance window is closed"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return None
+
+
+def get_open_window(window_id):
+    """
+    The window if attendance can be marked in it, from the window registry
+    when it is there.
+
+    Returns:
+        (window or None, error Response or None)
+    """
+    if window := window_registry.get(window_id):
+        return window, None
+
+    version = window_registry.version()
+    window = get_object_or_404(Attendance_Window, pk=window_id)
+    if closed := check_window_open(window):
+        return None, closed
+    window_registry.register(window, version)
+    return window, None
+
+
+# 25.632935, 85.101305
+# Polygon check (Co-ordinates of the building where attedance is mandatory)
+BOUNDARY_LATLON = [
+    (25.632875, 85.101206),
+    (25.632820, 85.101317),
+    (25.632982, 85.101409),
+    (25.633035, 85.101295),
+]
+COLLEGE_POLYGON = Polygon([(lon_, lat_) for (lat_, lon_) in BOUNDARY_LATLON])
+
+
+def check_can_mark(user, window):
+    """
+    Returns None if ``user`` can be marked in the window (batch and stored
+    location), or a Response object if not. Needs no photo, so it runs
+    before any inference.
+    """
+    # Batch validation
+    if user.batch_id != window.target_batch_id:
+        return Response(
+            {"message": "User does not belong to the window's batch"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    # Location check
+    if user.latitude is None or user.longitude is None:
+        return Response(
+            {"message": "User location not available"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        latitude = float(user.latitude)
+        longitude = float(user.longitude)
+    except:
+        return Response(
+            {"message": "Invalid user latitude/longitude"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    student_point = Point(longitude, latitude)
+    if not COLLEGE_POLYGON.covers(student_point):
+        return Response(
+            {"message": "Student is outside the college boundary"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return None
+
+
 class AttendanceWindowView(APIView):
 
     permission_classes = [IsAuthenticated]
@@ -37,6 +147,12 @@ class AttendanceWindowView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        # A registered window was validated against its batch and subject
+        # when it was opened.
+        if window := window_registry.get_active(batch_id, subject_id):
+            return Response(Attendance_WindowSerializer(window).data, status=status.HTTP_200_OK)
+
+        version = window_registry.version()
         batch = get_object_or_404(Batch, pk=batch_id)
         subject = get_object_or_404(Subject, pk=subject_id)
 
@@ -62,15 +178,9 @@ class AttendanceWindowView(APIView):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        # Check time validity
-        now = timezone.now()
-        window_end = window.start_time + timedelta(seconds=int(window.duration))
-        if now > window_end:
-            Attendance_Window.objects.filter(id=window.id).update(is_active=False)
-            return Response(
-                {"message": "Attendance window is closed"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        if closed := check_window_open(window):
+            return closed
+        window_registry.register(window, version)
 
         serializer = Attendance_WindowSerializer(window)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -100,6 +210,15 @@ class AttendanceWindowView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        try:
+            # Also accepts form data's "true"/"false"
+            is_active = serializers.BooleanField().to_internal_value(is_active)
+        except serializers.ValidationError:
+            return Response(
+                {"message": "'is_active' must be a boolean"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
         batch = get_object_or_404(Batch, pk=batch_id)
         subject = get_object_or_404(Subject, pk=subject_id)
 
@@ -110,6 +229,7 @@ class AttendanceWindowView(APIView):
             )
 
         today = timezone.localdate()
+        now = timezone.now()
 
         duration = data.get("duration")
         duration = max(30, int(duration)) if duration else 30
@@ -120,9 +240,12 @@ class AttendanceWindowView(APIView):
                 target_subject=subject,
                 date=today,
                 defaults={
-                    "start_time": timezone.now(),
+                    "start_time": now,
                     "duration": duration,
                     "is_active": is_active,
+                    # A window saved inactive has not opened, so the closer
+                    # gives it no ABSENT records.
+                    "opened_at": now if is_active else None,
                     "last_interacted_by": request.user,
                 },
             )
@@ -133,11 +256,21 @@ class AttendanceWindowView(APIView):
                 window.last_interacted_by = request.user
 
                 if is_active:
-                    window.start_time = timezone.now()
+                    window.start_time = now
+                    window.opened_at = now
                     window.duration = duration
+                    # Closed again later; students absent so far keep their
+                    # ABSENT record until they are marked.
+                    window.closed_at = None
 
                 window.save()
 
+        window_registry.invalidate(window)
+
+        if window.is_active:
+            # Load the roster now so the first students don't pay for it.
+            roster_cache.get(batch.id)
+
         serializer = Attendance_WindowSerializer(window)
 
         return Response(
@@ -149,56 +282,92 @@ class AttendanceWindowView(APIView):
 class AttendanceRecordView(APIView):
     permission_classes = [IsAuthenticated]
 
-    def post(self, request):
-        """Create or update attendance based on today's date (not created_at)."""
-
-        data = request.data
-        image = request.FILES.get("student_picture")
-        window_id = data.get("attendance_window")
+    @staticmethod
+    def _own_gallery(user, window):
+        """
+        The student's current-version centroid and templates, from the
+        window's roster cache when they are in it.
 
-        if not window_id:
-            return Response(
-                {"message": "'attendance_window' is required"},
+        Returns:
+            (np.ndarray (k, 128) or None, error Response or None)
+        """
+        gallery = roster_cache.get(window.target_batch_id).gallery_of(user.id)
+        if gallery is not None:
+            return gallery, None
+
+        face = FaceEmbedding.objects.filter(user=user).first()
+        if face is None or face.embedding is None:
+            return None, Response(
+                {"error": "No face registered for this user"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-
-        window = get_object_or_404(Attendance_Window, pk=window_id)
-
-        
-        # Check active window
-        if not window.is_active:
-            return Response(
-                {"message": "Attendance window is not active"},
-                status=status.HTTP_400_BAD_REQUEST,
+        # Vectors from another model or projection are not comparable
+        current = embedding_version()
+        embedding = face.embedding_for(current)
+        if embedding is None:
+            return None, Response(
+                {"error": "Your registered face is outdated. Please upload a new profile picture."},
+                status=status.HTTP_409_CONFLICT,
             )
+        templates = FaceTemplate.objects.filter(face=face, version=current).values_list(
+            "embedding", flat=True
+        )
+        return [embedding, *templates], None
 
-        # Check time validity
-        now = timezone.now()
-        window_end = window.start_time + timedelta(seconds=int(window.duration))
-        if now > window_end:
-            Attendance_Window.objects.filter(id=window.id).update(
-                is_active=False
-            )
-            return Response(
-                {"message": "Attendance window is closed"},
-                status=status.HTTP_400_BAD_REQUEST,
+    @staticmethod
+    def _closest_user(request, window, encoding_vector, own_gallery=None):
+        # STUDENT: compare only with self, in-process
+        if request.user.role == User.Role.STUDENT:
+            return RosterMatch(
+                request.user.id,
+                request.user.name,
+                float(distance_matrix([encoding_vector], own_gallery).min()),
             )
 
-        has_face_flag, encoding = has_face(image_file=image)
+        # TEACHER / ADMIN: the window's batch roster, in memory
+        match = roster_cache.get(window.target_batch_id).closest(encoding_vector)
+        if match is not None and match.distance <= FACE_MATCH_THRESHOLD:
+            return match
 
-        if not has_face_flag:
-            return Response(
-                {"error": "Not a valid face in the provided image"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        # Nobody in the batch: search whole database (HNSW index) so that
+        # students of other batches get a clear error
+        return nearest_user(encoding_vector)
 
-        if encoding is None:
-            return Response(
-                {"error": "Couldn't extract valid face data from the provided image"},
-                status=status.HTTP_403_FORBIDDEN,
-            )
+    @staticmethod
+    def _student_precheck(user, window):
+        """
+        Everything that can stop a student's mark without looking at the
+        photo: a current registered face, batch membership, location, and
+        an existing PRESENT record.
+
+        Returns:
+            (own gallery, existing PRESENT record or None, error Response or None)
+        """
+        if error := check_can_mark(user, window):
+            return None, None, error
+
+        own_gallery, error = AttendanceRecordView._own_gallery(user, window)
+        if error:
+            return None, None, error
 
-        encoding_vector = encoding.tolist() if hasattr(encoding, "tolist") else encoding
+        present = Attendance_Record.objects.filter(
+            user=user,
+            attendance_window=window,
+            status=Attendance_Record.Status.PRESENT,
+        ).first()
+        return own_gallery, present, None
+
+    def post(self, request):
+        """Create or update attendance based on today's date (not created_at).
+
+        'student_picture' may be repeated, or be a zip of frames, to submit a
+        short burst. Frames are embedded best-first and matching stops at
+        the first one that is clearly the same person.
+
+        Checks that need no inference (window, role, and for students batch,
+        geofence and an existing mark) run first, so the face model only
+        runs when a mark is possible.
+        """
 
         # role-based access control
         if allowed := check_allow_roles(
@@ -206,31 +375,77 @@ class AttendanceRecordView(APIView):
         ):
             return allowed
 
-        # STUDENT: compare only with self
+        data = request.data
+        uploads = request.FILES.getlist("student_picture")
+        window_id = data.get("attendance_window")
+
+        if not window_id:
+            return Response(
+                {"message": "'attendance_window' is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        window, closed = get_open_window(window_id)
+        if closed:
+            return closed
+
+        if not uploads:
+            return Response(
+                {"message": "'student_picture' is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        own_gallery = None
         if request.user.role == User.Role.STUDENT:
-            if request.user.face_embedding is None:
+            own_gallery, present, error = self._student_precheck(request.user, window)
+            if error:
+                return error
+            if present:
+                # Already marked: nothing a photo could change
                 return Response(
-                    {"error": "No face registered for this user"},
-                    status=status.HTTP_400_BAD_REQUEST,
+                    AttendanceRecordSerializer(present).data, status=status.HTTP_200_OK
                 )
 
-            user_data = (
-                User.objects.filter(id=request.user.id)
-                .annotate(distance=L2Distance("face_embedding", encoding_vector))
-                .first()
+        try:
+            frames = read_burst_frames(uploads)
+        except ValueError:
+            return Response(
+                {"error": REASON_MESSAGES[REASON_UNREADABLE], "reason": REASON_UNREADABLE},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # TEACHER / ADMIN: search whole database
-        else:
-            user_data = (
-                User.objects.annotate(distance=L2Distance("face_embedding", encoding_vector))
-                .order_by("distance")
-                .first()
+        early_exit_distance = getattr(
+            settings, "FACE_BURST_EARLY_EXIT_DISTANCE", FACE_MATCH_THRESHOLD
+        )
+        user_data = None
+        matched_encoding = None
+        failure_reason = None
+        for encoding, reason in iter_burst(frames):
+            if reason == REASON_INFERENCE_UNAVAILABLE:
+                # Later frames would each wait out the same timeout.
+                failure_reason = reason
+                break
+            if encoding is None:
+                failure_reason = failure_reason or reason
+                continue
+
+            candidate = self._closest_user(request, window, encoding.tolist(), own_gallery)
+            if candidate is None:
+                continue
+            if user_data is None or candidate.distance < user_data.distance:
+                user_data = candidate
+                matched_encoding = encoding
+            if user_data.distance <= early_exit_distance:
+                break
+
+        if user_data is None and failure_reason:
+            return Response(
+                {"error": REASON_MESSAGES[failure_reason], "reason": failure_reason},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+                if failure_reason == REASON_INFERENCE_UNAVAILABLE
+                else status.HTTP_400_BAD_REQUEST,
             )
 
-        print(user_data)
-        print(user_data.distance)
-
         if not user_data:
             return Response(
                 {
@@ -238,7 +453,6 @@ class AttendanceRecordView(APIView):
                 },
                 status=status.HTTP_404_NOT_FOUND,
             )
-        print(user_data)
         if user_data and user_data.distance > FACE_MATCH_THRESHOLD:
             return Response(
                 {"error": "Face did not match! Make sure you are not wearing glasses and you are close to the camera!"},
@@ -248,82 +462,176 @@ class AttendanceRecordView(APIView):
         if request.user.role == User.Role.STUDENT:
             target_user = request.user
         else:
-            if not user_data:
-                return Response(
-                    {"message": "'user' is required"},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            target_user = get_object_or_404(User, pk=user_data)
+            # Who is being marked is only known now
+            target_user = get_object_or_404(User, pk=user_data.pk)
+            if error := check_can_mark(target_user, window):
+                return error
+
+        # One upsert on (user, window), whether or not a record exists
+        record, created = mark_present(target_user, window, request.user)
+
+        # A confident match may be a new view of the face for the gallery;
+        # it is checked against the enrollment template off the request path.
+        if user_data.distance <= getattr(settings, "FACE_GALLERY_ADD_DISTANCE", 0.6):
+            queue_capture(target_user.id, matched_encoding)
+
+        serializer = AttendanceRecordSerializer(record)
+        return Response(
+            serializer.data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
 
+class AttendanceRecordPrecheckView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """Whether a photo submitted now could mark attendance.
 
-        # Students can only mark their own attendance
-        if request.user.role == User.Role.STUDENT and request.user.id != target_user.id:
+        Runs every check of AttendanceRecordView that needs no photo, so
+        clients can skip the capture (and the server the inference) when it
+        would be rejected anyway. Errors are the ones the record endpoint
+        would return.
+
+        Query params:
+        - attendance_window: int (required)
+        """
+        if allowed := check_allow_roles(
+            request.user, [User.Role.TEACHER, User.Role.ADMIN, User.Role.STUDENT]
+        ):
+            return allowed
+
+        window_id = request.query_params.get("attendance_window")
+        if not window_id:
             return Response(
-                {"message": "Students can only mark their own attendance"},
-                status=status.HTTP_403_FORBIDDEN,
+                {"message": "'attendance_window' is required"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Batch validation
-        if target_user.batch_id != window.target_batch_id:
+        window, closed = get_open_window(window_id)
+        if closed:
+            return closed
+
+        result = {"attendance_window": window.id, "can_mark": True, "already_marked": False}
+
+        if request.user.role == User.Role.STUDENT:
+            _, present, error = AttendanceRecordView._student_precheck(request.user, window)
+            if error:
+                return error
+            if present:
+                result.update(
+                    can_mark=False,
+                    already_marked=True,
+                    record=AttendanceRecordSerializer(present).data,
+                )
+        else:
+            # Teachers mark whoever is in the photo; load the roster now so
+            # the first mark does not pay for it.
+            roster_cache.get(window.target_batch_id)
+
+        return Response(result, status=status.HTTP_200_OK)
+
+
+class AttendanceGroupRecordView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """Mark everyone recognised in one or a few classroom photos.
+
+        Every face is embedded in one batched pass and matched against the
+        window's batch roster with a single distance matrix and one-to-one
+        assignment. Matched students go through the same batch and location
+        checks as a single mark; those who fail are reported under "skipped"
+        and not marked.
+
+        Form data:
+        - attendance_window: int (required)
+        - class_pictures: one or more image files (required)
+        """
+        if allowed := check_allow_roles(
+            request.user, [User.Role.TEACHER, User.Role.ADMIN]
+        ):
+            return allowed
+
+        window_id = request.data.get("attendance_window")
+        images = request.FILES.getlist("class_pictures")
+
+        if not window_id or not images:
             return Response(
-                {"message": "User does not belong to the window's batch"},
+                {"message": "'attendance_window' and 'class_pictures' are required"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        today = timezone.localdate()
-
-        # Location check
-        if target_user.latitude is None or target_user.longitude is None:
+        max_photos = getattr(settings, "FACE_GROUP_MAX_PHOTOS", 5)
+        if len(images) > max_photos:
             return Response(
-                {"message": "User location not available"},
+                {"message": f"At most {max_photos} photos can be uploaded at once"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        window, closed = get_open_window(window_id)
+        if closed:
+            return closed
+
         try:
-            latitude = float(target_user.latitude)
-            longitude = float(target_user.longitude)
-        except:
+            encodings = analyze_group_photos(images)
+        except Exception as e:
+            # FaceInferenceError and TimeoutError, or anything else that
+            # escapes the engine: the photos are not at fault.
+            logger.warning("Group photo inference unavailable: %s", e)
             return Response(
-                {"message": "Invalid user latitude/longitude"},
-                status=status.HTTP_400_BAD_REQUEST,
+                {
+                    "error": REASON_MESSAGES[REASON_INFERENCE_UNAVAILABLE],
+                    "reason": REASON_INFERENCE_UNAVAILABLE,
+                },
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
             )
 
-        # 25.632935, 85.101305
-        # Polygon check (Co-ordinates of the building where attedance is mandatory)
-        boundary_latlon = [
-            (25.632875, 85.101206),
-            (25.632820, 85.101317),
-            (25.632982, 85.101409),
-            (25.633035, 85.101295),
-        ]
-        polygon_coords = [(lon_, lat_) for (lat_, lon_) in boundary_latlon]
-        college_polygon = Polygon(polygon_coords)
-
-        student_point = Point(longitude, latitude)
-        if not college_polygon.covers(student_point):
+        if not len(encodings):
             return Response(
-                {"message": "Student is outside the college boundary"},
+                {"error": "No faces found in the provided photos", "reason": REASON_NO_FACE},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # ✅ Now check: does today's record already exist?
-        record, created = Attendance_Record.objects.get_or_create(
-            user=target_user,
-            attendance_window=window,
-            date=today,  # ✅ key change
-            defaults={
-                "status": Attendance_Record.Status.PRESENT,
-                "marked_by": request.user,
-            },
-        )
+        roster = roster_cache.get(window.target_batch_id)
 
-        if not created:
-            record.status = Attendance_Record.Status.PRESENT
-            record.marked_by = request.user
-            record.save()
+        matches = []
+        if len(roster):
+            distances = roster.gallery_distances(encodings)
+            matches = assign_one_to_one(distances, FACE_MATCH_THRESHOLD)
+
+        users = User.objects.in_bulk(
+            [int(roster.user_ids[roster_index]) for _, roster_index, _ in matches]
+        )
+        marked = []
+        skipped = []
+        for _, roster_index, distance in matches:
+            user_id = int(roster.user_ids[roster_index])
+            entry = {
+                "user": {"id": user_id, "name": roster.names[roster_index]},
+                "distance": round(distance, 4),
+            }
+            user = users.get(user_id)
+            if user is None:
+                skipped.append({**entry, "message": "User not found"})
+            elif error := check_can_mark(user, window):
+                skipped.append({**entry, "message": error.data["message"]})
+            else:
+                marked.append(entry)
+
+        created, updated = mark_present_many(
+            [entry["user"]["id"] for entry in marked], window, request.user
+        )
 
-        serializer = AttendanceRecordSerializer(record)
         return Response(
-            serializer.data,
-            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+            {
+                "attendance_window": window.id,
+                "faces_detected": len(encodings),
+                "unmatched_faces": len(encodings) - len(matches),
+                "created": created,
+                "updated": updated,
+                "marked": marked,
+                "skipped": skipped,
+            },
+            status=status.HTTP_200_OK,
         )
@@ -0,0 +1,67 @@
+"""Health endpoints for load balancers and orchestration."""
+
+import time
+
+from django.db import connection
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+
+from college.utils.roster_cache import roster_cache
+from college.utils.window_registry import window_registry
+from services.face_recognition import (
+    cascade_stats,
+    ensure_warmup_started,
+    get_embedding_cache,
+    model_status,
+)
+from ..models import User
+
+
+def _database_status():
+    started = time.perf_counter()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+    except Exception as e:
+        return {"ok": False, "error": type(e).__name__}
+    return {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+
+class ReadinessView(APIView):
+    """
+    Reports whether this worker can serve attendance marks right now.
+    Returns 503 until the face model is loaded and the database is reachable.
+    Anonymous callers (load balancers) only get the ready flag; admins also
+    get the model, database and cache details.
+    """
+
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        # A worker started with FACE_WARMUP=disabled warms up on the first probe
+        # instead of on the first student's request.
+        ensure_warmup_started()
+
+        model = model_status()
+        database = _database_status()
+        ready = bool(model["ready"]) and database["ok"]
+
+        data = {"ready": ready}
+        user = request.user
+        if user.is_authenticated and user.role == User.Role.ADMIN:
+            data.update(
+                model=model,
+                database=database,
+                embedding_cache=get_embedding_cache().stats(),
+                roster_cache=roster_cache.stats(),
+                window_registry=window_registry.stats(),
+                detector_cascade=cascade_stats.snapshot(),
+            )
+
+        return Response(
+            data,
+            status=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
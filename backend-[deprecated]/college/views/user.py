@@ -8,8 +8,14 @@ from rest_framework.response import Response
 from rest_framework import status
 
 from college.utils.check_roles import check_allow_roles
+from college.utils.face_gallery import enroll
 from services import upload_to_supabase
-from services.face_recognition import has_face
+from services.face_quality import (
+    REASON_INFERENCE_UNAVAILABLE,
+    REASON_MESSAGES,
+    REASON_NO_FACE,
+)
+from services.face_recognition import analyze_face
 from ..serializers import *
 from ..models import *
 from rest_framework_simplejwt.tokens import RefreshToken
@@ -131,19 +137,25 @@ class CurrentUserView(APIView):
 
         if image_file:
 
-            has_face_flag, encoding = has_face(image_file)
+            encoding, reason = analyze_face(image_file)
 
-            if not has_face_flag:
+            if encoding is None:
                 return Response(
-                    {"error": "No human face detected in the image."},
-                    status=status.HTTP_400_BAD_REQUEST,
+                    {
+                        "error": "No human face detected in the image."
+                        if reason == REASON_NO_FACE
+                        else REASON_MESSAGES[reason],
+                        "reason": reason,
+                    },
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE
+                    if reason == REASON_INFERENCE_UNAVAILABLE
+                    else status.HTTP_400_BAD_REQUEST,
                 )
             try:
                 embedding_vector = (
                     encoding.tolist() if hasattr(encoding, "tolist") else encoding
                 )
-                user.face_embedding = embedding_vector
-                user.save(update_fields=["face_embedding"])
+                enroll(user, embedding_vector)
                 uploaded_url = upload_to_supabase(image_file=image_file)
             except Exception as e:
                 print("Upload Error:", e)
@@ -45,6 +45,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "corsheaders",
     "rest_framework",
     "college.apps.UsersConfig",
@@ -120,6 +121,22 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+if os.environ.get("REDIS_URL"):
+    CACHES["default"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ.get("REDIS_URL"),
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -166,5 +183,100 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=30),
 }
 
+# Face recognition
+# Model warmup for serving processes: "eager", "background" or "disabled".
+FACE_WARMUP = os.environ.get("FACE_WARMUP", "background")
+# A failed warmup is retried from the readiness probe after this many
+# seconds, doubling after every failure up to five minutes.
+FACE_WARMUP_RETRY_SECONDS = float(os.environ.get("FACE_WARMUP_RETRY_SECONDS", "5"))
+# When FACE_INFERENCE_SOCKET is set, web workers send images to the
+# inference server (`manage.py run_face_server`) instead of loading the model.
+FACE_INFERENCE_SOCKET = os.environ.get("FACE_INFERENCE_SOCKET") or None
+FACE_INFERENCE_TIMEOUT = float(os.environ.get("FACE_INFERENCE_TIMEOUT", "10"))
+# The readiness probe's ping only asks whether the server is up.
+FACE_INFERENCE_PING_TIMEOUT = float(os.environ.get("FACE_INFERENCE_PING_TIMEOUT", "0.5"))
+FACE_INFERENCE_WORKERS = int(os.environ.get("FACE_INFERENCE_WORKERS", "1"))
+# Coalesce embedding requests arriving within this window into one forward
+# pass (0 disables batching).
+FACE_BATCH_WINDOW_MS = float(os.environ.get("FACE_BATCH_WINDOW_MS", "15"))
+FACE_BATCH_MAX_SIZE = int(os.environ.get("FACE_BATCH_MAX_SIZE", "16"))
+# Uploads are decoded at reduced scale to this longest side; anything above
+# FACE_DECODE_MAX_PIXELS is rejected before decoding.
+FACE_DECODE_MAX_SIDE = int(os.environ.get("FACE_DECODE_MAX_SIDE", "1024"))
+FACE_DECODE_MAX_PIXELS = int(os.environ.get("FACE_DECODE_MAX_PIXELS", "40000000"))
+# Classroom photos keep more resolution so that faces in the back rows survive.
+FACE_GROUP_DECODE_MAX_SIDE = int(os.environ.get("FACE_GROUP_DECODE_MAX_SIDE", "2560"))
+FACE_GROUP_MAX_PHOTOS = int(os.environ.get("FACE_GROUP_MAX_PHOTOS", "5"))
+# Burst uploads to attendance/record/: frames are embedded best-first and
+# matching stops at the first distance at or below the early-exit distance
+# (kept well under the 0.95 match threshold so a borderline frame does not
+# hide a better one).
+FACE_BURST_MAX_FRAMES = int(os.environ.get("FACE_BURST_MAX_FRAMES", "8"))
+FACE_BURST_MAX_FRAME_BYTES = int(os.environ.get("FACE_BURST_MAX_FRAME_BYTES", str(10 * 1024 * 1024)))
+FACE_BURST_EARLY_EXIT_DISTANCE = float(os.environ.get("FACE_BURST_EARLY_EXIT_DISTANCE", "0.8"))
+# Embedding engine: "deepface" (TensorFlow), "onnx" (ONNX Runtime) or "fake"
+# (deterministic, for tests and benchmarks).
+FACE_EMBEDDING_ENGINE = os.environ.get("FACE_EMBEDDING_ENGINE", "deepface")
+FACE_ONNX_MODEL_PATH = os.environ.get("FACE_ONNX_MODEL_PATH") or str(
+    BASE_DIR / "models" / "arcface.onnx"
+)
+# "int8" runs the dynamically quantized model (`manage.py quantize_arcface`);
+# see benchmarks/arcface_int8_report.py before switching.
+FACE_ONNX_PRECISION = os.environ.get("FACE_ONNX_PRECISION", "fp32")
+FACE_ONNX_INT8_MODEL_PATH = os.environ.get("FACE_ONNX_INT8_MODEL_PATH") or str(
+    BASE_DIR / "models" / "arcface.int8.onnx"
+)
+# 0 = split the CPU cores evenly between FACE_INFERENCE_WORKERS.
+FACE_ONNX_INTRA_OP_THREADS = int(os.environ.get("FACE_ONNX_INTRA_OP_THREADS", "0"))
+FACE_ONNX_INTER_OP_THREADS = int(os.environ.get("FACE_ONNX_INTER_OP_THREADS", "1"))
+# Detector backends tried in order; later (slower, more accurate) stages
+# only run when the earlier ones find no face.
+FACE_DETECTOR_CASCADE = os.environ.get("FACE_DETECTOR_CASCADE", "opencv,retinaface")
+# 512->128 projection fitted with `manage.py fit_face_projection`; unset
+# keeps the first 128 dims. Changing it changes the embedding version, so
+# stored faces must be re-embedded (or re-enrolled) before they match.
+FACE_PROJECTION_PATH = os.environ.get("FACE_PROJECTION_PATH") or None
+# Pre-filter run before detection: rejects dark, overexposed, blurry and
+# tiny-face frames with a specific reason code.
+FACE_QUALITY_CHECK = os.environ.get("FACE_QUALITY_CHECK", "true").lower() == "true"
+FACE_QUALITY_MIN_BRIGHTNESS = float(os.environ.get("FACE_QUALITY_MIN_BRIGHTNESS", "40"))
+FACE_QUALITY_MAX_BRIGHTNESS = float(os.environ.get("FACE_QUALITY_MAX_BRIGHTNESS", "220"))
+FACE_QUALITY_MIN_SHARPNESS = float(os.environ.get("FACE_QUALITY_MIN_SHARPNESS", "40"))
+FACE_QUALITY_MIN_FACE_PX = int(os.environ.get("FACE_QUALITY_MIN_FACE_PX", "96"))
+# Embeddings of repeated uploads, keyed by image hash + model signature.
+# Set FACE_EMBEDDING_CACHE_ALIAS (e.g. "default" with REDIS_URL) to share
+# entries across workers.
+FACE_EMBEDDING_CACHE_SIZE = int(os.environ.get("FACE_EMBEDDING_CACHE_SIZE", "1024"))
+FACE_EMBEDDING_CACHE_TTL = int(os.environ.get("FACE_EMBEDDING_CACHE_TTL", "600"))
+FACE_EMBEDDING_CACHE_ALIAS = os.environ.get("FACE_EMBEDDING_CACHE_ALIAS") or None
+# HNSW candidate list size for 1:N face search (pgvector's default is 40);
+# raise for recall, lower for latency. See benchmarks/face_search.py.
+FACE_SEARCH_EF_SEARCH = int(os.environ.get("FACE_SEARCH_EF_SEARCH", "40"))
+# 1:N search walks a half-precision HNSW index and re-ranks its
+# FACE_SEARCH_RESCORE_K best candidates at full precision.
+FACE_SEARCH_RESCORE_K = int(os.environ.get("FACE_SEARCH_RESCORE_K", "10"))
+# "halfvec" keeps the in-memory roster caches in float16 (half the RSS).
+# See benchmarks/embedding_storage.py for the size and accuracy trade-off.
+FACE_EMBEDDING_STORAGE = os.environ.get("FACE_EMBEDDING_STORAGE", "vector")
+# Per-process roster embedding matrices are reloaded when their batch's
+# version changes in the default cache, and at least this often.
+FACE_ROSTER_CACHE_TTL = int(os.environ.get("FACE_ROSTER_CACHE_TTL", "300"))
+# Per-process copies of open attendance windows are dropped after this many
+# seconds, so with the default LocMem cache a window closed early stops
+# being served by other workers within that time.
+ATTENDANCE_WINDOW_CACHE_TTL = float(os.environ.get("ATTENDANCE_WINDOW_CACHE_TTL", "5"))
+# Each user keeps up to FACE_GALLERY_SIZE templates; attendance captures
+# within FACE_GALLERY_ADD_DISTANCE of the enrollment template that are at
+# least FACE_GALLERY_MIN_NOVELTY from every template are added. Search ranks by
+# centroid and compares templates for the FACE_GALLERY_CANDIDATES closest.
+FACE_GALLERY_SIZE = int(os.environ.get("FACE_GALLERY_SIZE", "5"))
+FACE_GALLERY_ADD_DISTANCE = float(os.environ.get("FACE_GALLERY_ADD_DISTANCE", "0.6"))
+FACE_GALLERY_MIN_NOVELTY = float(os.environ.get("FACE_GALLERY_MIN_NOVELTY", "0.3"))
+FACE_GALLERY_CANDIDATES = int(os.environ.get("FACE_GALLERY_CANDIDATES", "3"))
+# Captures are queued by marks and applied by a background thread every
+# FACE_GALLERY_FLUSH_SECONDS, with one roster reload per changed batch.
+FACE_GALLERY_FLUSH_SECONDS = float(os.environ.get("FACE_GALLERY_FLUSH_SECONDS", "30"))
+FACE_GALLERY_MAX_PENDING = int(os.environ.get("FACE_GALLERY_MAX_PENDING", "1000"))
+
 # CORS (for demo)
 CORS_ALLOW_ALL_ORIGINS = True
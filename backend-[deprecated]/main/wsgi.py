@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'main.settings')
 
 application = get_wsgi_application()
+
+# Only serving processes import this module, so management commands and
+# tests never load the face model. See FACE_WARMUP in settings.
+from services.face_recognition import start_warmup  # noqa: E402
+
+start_warmup()
@@ -0,0 +1,126 @@
+"""
+Embedding cache keyed by the content hash of the uploaded image.
+
+Retries of the same JPEG (after a timeout or a geofence error) reuse the
+previous result instead of running inference again. Entries live in a
+bounded in-process LRU with a TTL and, when an alias is configured, in
+Django's cache framework so that they are shared across workers.
+
+A cached "no face" result is stored as an empty payload.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+_NO_FACE = b""
+_KEY_PREFIX = "face-embedding"
+
+
+class EmbeddingCache:
+
+    def __init__(self, max_entries=1024, ttl=600, alias=None):
+        self.max_entries = max(0, int(max_entries))
+        self.ttl = ttl
+        self.alias = alias
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(file_bytes, signature):
+        digest = hashlib.sha256(file_bytes).hexdigest()
+        return f"{_KEY_PREFIX}:{signature}:{digest}"
+
+    def get(self, key):
+        """
+        Returns:
+            (hit: bool, embedding: np.ndarray or None)
+        """
+        payload = self._get_local(key)
+        if payload is None:
+            payload = self._get_shared(key)
+            if payload is not None:
+                self._set_local(key, payload)
+                with self._lock:
+                    self.shared_hits += 1
+
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+
+        if payload == _NO_FACE:
+            return True, None
+        return True, np.frombuffer(payload, dtype=np.float32)
+
+    def set(self, key, embedding):
+        if embedding is None:
+            payload = _NO_FACE
+        else:
+            payload = np.asarray(embedding, dtype=np.float32).tobytes()
+
+        self._set_local(key, payload)
+
+        shared = self._shared()
+        if shared is not None:
+            shared.set(key, payload, timeout=self.ttl)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "shared_alias": self.alias,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+    def _get_local(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def _set_local(self, key, payload):
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _get_shared(self, key):
+        shared = self._shared()
+        if shared is None:
+            return None
+        return shared.get(key)
+
+    def _shared(self):
+        if not self.alias:
+            return None
+        from django.core.cache import caches
+
+        return caches[self.alias]
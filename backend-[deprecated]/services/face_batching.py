@@ -0,0 +1,114 @@
+"""
+Micro-batching for face embedding.
+
+Requests that arrive within a short window are coalesced into one batched
+forward pass and the results are fanned back out to the waiting callers.
+Most useful inside the inference server, where concurrent connections from
+all web workers meet in one process.
+"""
+
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class _Pending:
+    __slots__ = ("image", "result", "error", "done")
+
+    def __init__(self, image):
+        self.image = image
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent ``submit`` calls into calls of ``embed_batch``.
+
+    A batch is dispatched when ``max_batch_size`` requests are queued or
+    ``window_ms`` has passed since the first request of the batch arrived.
+    """
+
+    def __init__(self, embed_batch, window_ms=10, max_batch_size=16):
+        self._embed_batch = embed_batch
+        self._window = window_ms / 1000.0
+        self._max_batch_size = max(1, int(max_batch_size))
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+        self.batches = 0
+        self.images = 0
+
+    def submit(self, image, timeout=None):
+        """
+        Queues one image and blocks until its batch has been processed.
+
+        Returns:
+            whatever ``embed_batch`` produced for ``image``
+
+        Raises:
+            TimeoutError: the batch did not finish within ``timeout`` seconds
+            Exception: re-raised from ``embed_batch``
+        """
+        self._ensure_worker()
+        pending = _Pending(image)
+        self._queue.put(pending)
+        if not pending.done.wait(timeout):
+            raise TimeoutError(f"Embedding batch did not finish within {timeout}s")
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "images": self.images,
+            "mean_batch_size": (self.images / self.batches) if self.batches else 0.0,
+        }
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name="embedding-batcher", daemon=True
+                )
+                self._worker.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self._window
+        while len(batch) < self._max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            error = None
+            try:
+                results = self._embed_batch([pending.image for pending in batch])
+            except Exception as e:
+                logger.exception("Batched embedding failed")
+                error = e
+                results = [None] * len(batch)
+
+            self.batches += 1
+            self.images += len(batch)
+
+            for pending, result in zip(batch, results):
+                pending.result = result
+                pending.error = error
+                pending.done.set()
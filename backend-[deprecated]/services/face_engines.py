@@ -0,0 +1,318 @@
+"""
+Embedding engines behind ``has_face``.
+
+An engine turns decoded BGR images into raw (un-normalized) embeddings.
+The engine is selected with FACE_EMBEDDING_ENGINE:
+
+    deepface  DeepFace detector cascade + ArcFace on TensorFlow
+    onnx      same detector cascade + ArcFace exported to ONNX, run by
+              ONNX Runtime with tuned intra/inter-op threads; fp32 or a
+              dynamically quantized int8 model (FACE_ONNX_PRECISION)
+    fake      deterministic pseudo-embeddings derived from the pixels, for
+              tests and benchmarks; never loads a model
+
+The deepface and onnx engines share detection and alignment, so their
+embeddings are interchangeable (see benchmarks/engine_parity.py).
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ARCFACE_INPUT_SIZE = (112, 112)
+ARCFACE_DIMENSIONS = 512
+
+
+# ---------------------------------------------------------
+# Detection
+# ---------------------------------------------------------
+class DetectorCascadeStats:
+    """Per-stage timings and fallback counters for the detector cascade."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.images = 0
+            self.fallbacks = 0
+            self.not_found = 0
+            self.stages = {}
+
+    def record(self, attempts, found_stage):
+        """``attempts`` is a list of (stage, found, elapsed_ms)."""
+        with self._lock:
+            self.images += 1
+            if found_stage is None:
+                self.not_found += 1
+            elif found_stage > 0:
+                self.fallbacks += 1
+
+            for stage, found, elapsed_ms in attempts:
+                entry = self.stages.setdefault(
+                    stage, {"attempts": 0, "found": 0, "total_ms": 0.0}
+                )
+                entry["attempts"] += 1
+                entry["found"] += int(found)
+                entry["total_ms"] += elapsed_ms
+
+    def snapshot(self):
+        with self._lock:
+            stages = {
+                stage: {
+                    **entry,
+                    "mean_ms": entry["total_ms"] / entry["attempts"] if entry["attempts"] else 0.0,
+                    "hit_rate": entry["found"] / entry["attempts"] if entry["attempts"] else 0.0,
+                }
+                for stage, entry in self.stages.items()
+            }
+            return {
+                "images": self.images,
+                "fallbacks": self.fallbacks,
+                "not_found": self.not_found,
+                "fallback_rate": self.fallbacks / self.images if self.images else 0.0,
+                "stages": stages,
+            }
+
+
+cascade_stats = DetectorCascadeStats()
+
+
+def detect_faces(image_bgr, cascade, enforce_detection=True):
+    """
+    Runs the detector cascade on one image.
+
+    Returns:
+        all face objects from the first stage that found any (largest
+        first), or an empty list
+    """
+    from deepface.modules import detection
+
+    attempts = []
+
+    for index, backend in enumerate(cascade):
+        started = time.perf_counter()
+        try:
+            face_objs = detection.extract_faces(
+                img_path=image_bgr,
+                detector_backend=backend,
+                enforce_detection=enforce_detection,
+                grayscale=False,
+                align=True,
+            )
+        except Exception:
+            face_objs = None
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        attempts.append((backend, bool(face_objs), elapsed_ms))
+        if face_objs:
+            cascade_stats.record(attempts, index)
+            if index > 0:
+                logger.info("Face found by fallback detector %s", backend)
+            return sorted(
+                face_objs,
+                key=lambda obj: obj["facial_area"]["w"] * obj["facial_area"]["h"],
+                reverse=True,
+            )
+
+    cascade_stats.record(attempts, None)
+    return []
+
+
+# ---------------------------------------------------------
+# Engines
+# ---------------------------------------------------------
+class EmbeddingEngine:
+    name = "base"
+
+    def embed_batch(self, images_bgr):
+        """
+        Returns:
+            list with one raw embedding (np.ndarray) or None per input image
+        """
+        raise NotImplementedError
+
+    def embed_all_faces(self, images_bgr):
+        """
+        Returns:
+            list with one list of raw embeddings (one per detected face)
+            per input image
+        """
+        return [[] if e is None else [e] for e in self.embed_batch(images_bgr)]
+
+
+class _AlignedFaceEngine(EmbeddingEngine):
+    """Detects and aligns one face per image, then embeds all faces at once."""
+
+    def __init__(self, cascade, enforce_detection=True):
+        self.cascade = tuple(cascade)
+        self.enforce_detection = enforce_detection
+
+    def forward(self, faces):
+        """``faces`` is a float32 (n, 112, 112, 3) BGR batch."""
+        raise NotImplementedError
+
+    def align_batch(self, images_bgr, all_faces=False):
+        """
+        Returns:
+            (faces: float32 (n, 112, 112, 3) or None, owners: index of the
+            source image for each face)
+
+        Only the largest face of each image is kept unless ``all_faces``.
+        """
+        from deepface.modules import preprocessing
+
+        faces = []
+        owners = []
+        for index, image_bgr in enumerate(images_bgr):
+            face_objs = detect_faces(image_bgr, self.cascade, self.enforce_detection)
+            if not all_faces:
+                face_objs = face_objs[:1]
+
+            for face_obj in face_objs:
+                # extract_faces returns RGB in [0, 1]; the model expects BGR.
+                face = face_obj["face"][:, :, ::-1]
+                face = preprocessing.resize_image(
+                    img=face, target_size=(ARCFACE_INPUT_SIZE[1], ARCFACE_INPUT_SIZE[0])
+                )
+                faces.append(preprocessing.normalize_input(img=face, normalization="base"))
+                owners.append(index)
+
+        if not faces:
+            return None, owners
+        return np.concatenate(faces, axis=0).astype(np.float32), owners
+
+    def embed_batch(self, images_bgr):
+        results = [None] * len(images_bgr)
+
+        faces, owners = self.align_batch(images_bgr)
+        if faces is None:
+            return results
+
+        embeddings = self.forward(faces)
+        for index, embedding in zip(owners, embeddings):
+            results[index] = np.asarray(embedding, dtype=np.float32)
+
+        return results
+
+    def embed_all_faces(self, images_bgr):
+        results = [[] for _ in images_bgr]
+
+        faces, owners = self.align_batch(images_bgr, all_faces=True)
+        if faces is None:
+            return results
+
+        embeddings = self.forward(faces)
+        for index, embedding in zip(owners, embeddings):
+            results[index].append(np.asarray(embedding, dtype=np.float32))
+
+        return results
+
+
+class DeepFaceEngine(_AlignedFaceEngine):
+    name = "deepface"
+
+    def __init__(self, cascade, model_name="ArcFace", enforce_detection=True):
+        super().__init__(cascade, enforce_detection)
+        self.model_name = model_name
+
+    def forward(self, faces):
+        from deepface import DeepFace
+
+        model = DeepFace.build_model(model_name=self.model_name)
+        return model.model(faces, training=False).numpy()
+
+
+class OnnxArcFaceEngine(_AlignedFaceEngine):
+    name = "onnx"
+
+    def __init__(self, cascade, model_path, intra_op_threads=0, inter_op_threads=1,
+                 enforce_detection=True):
+        super().__init__(cascade, enforce_detection)
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise RuntimeError(
+                "FACE_EMBEDDING_ENGINE='onnx' requires the onnxruntime package"
+            ) from e
+
+        if not os.path.exists(model_path):
+            raise RuntimeError(
+                f"ONNX model not found at {model_path}; run "
+                "`python manage.py export_arcface_onnx` (and `quantize_arcface` for int8)"
+            )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = intra_op_threads or _default_intra_op_threads()
+        options.inter_op_num_threads = max(1, inter_op_threads)
+
+        self.model_path = model_path
+        self._session = ort.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._input_name = self._session.get_inputs()[0].name
+
+    def forward(self, faces):
+        return self._session.run(None, {self._input_name: faces})[0]
+
+
+class FakeEngine(EmbeddingEngine):
+    """
+    Deterministic pseudo-embeddings: the same pixels always give the same
+    vector. Blank (single-colour) images count as "no face".
+    """
+
+    name = "fake"
+
+    def embed_batch(self, images_bgr):
+        results = []
+        for image_bgr in images_bgr:
+            image_bgr = np.ascontiguousarray(image_bgr)
+            if image_bgr.size == 0 or image_bgr.min() == image_bgr.max():
+                results.append(None)
+                continue
+            seed = int.from_bytes(hashlib.sha256(image_bgr.tobytes()).digest()[:8], "little")
+            rng = np.random.default_rng(seed)
+            results.append(rng.standard_normal(ARCFACE_DIMENSIONS).astype(np.float32))
+        return results
+
+
+def _default_intra_op_threads():
+    # Split the cores between the inference worker processes.
+    from django.conf import settings
+
+    workers = max(1, getattr(settings, "FACE_INFERENCE_WORKERS", 1))
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+def build_engine(name, cascade, model_name="ArcFace", enforce_detection=True):
+    from django.conf import settings
+
+    name = (name or "deepface").lower()
+    if name == "deepface":
+        return DeepFaceEngine(cascade, model_name=model_name, enforce_detection=enforce_detection)
+    if name == "onnx":
+        precision = getattr(settings, "FACE_ONNX_PRECISION", "fp32")
+        if precision == "int8":
+            model_path = str(settings.FACE_ONNX_INT8_MODEL_PATH)
+        else:
+            model_path = str(settings.FACE_ONNX_MODEL_PATH)
+        return OnnxArcFaceEngine(
+            cascade,
+            model_path=model_path,
+            intra_op_threads=getattr(settings, "FACE_ONNX_INTRA_OP_THREADS", 0),
+            inter_op_threads=getattr(settings, "FACE_ONNX_INTER_OP_THREADS", 1),
+            enforce_detection=enforce_detection,
+        )
+    if name == "fake":
+        return FakeEngine()
+    raise ValueError(f"Unknown FACE_EMBEDDING_ENGINE {name!r}")
@@ -0,0 +1,128 @@
+"""
+Vectorized matching of face embeddings against a roster.
+
+All embeddings are L2-normalized, so distances are Euclidean distances
+between unit vectors (the same metric as pgvector's L2Distance).
+"""
+
+import numpy as np
+
+
+def distance_matrix(faces, roster):
+    """
+    Returns:
+        np.ndarray (len(faces), len(roster)) of L2 distances
+    """
+    faces = np.asarray(faces, dtype=np.float32)
+    roster = np.asarray(roster, dtype=np.float32)
+    squared = (
+        np.sum(faces * faces, axis=1)[:, None]
+        + np.sum(roster * roster, axis=1)[None, :]
+        - 2.0 * (faces @ roster.T)
+    )
+    return np.sqrt(np.maximum(squared, 0.0))
+
+
+def centroid(embeddings):
+    """
+    Normalized mean of a person's embeddings, the single vector that
+    represents them in 1:N search.
+
+    Returns:
+        np.ndarray (d,) float32, or None if there are no embeddings
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if embeddings.size == 0:
+        return None
+    mean = embeddings.reshape(-1, embeddings.shape[-1]).mean(axis=0)
+    norm = float(np.linalg.norm(mean))
+    if norm == 0.0:
+        return None
+    return mean / norm
+
+
+def gallery_distance_matrix(faces, gallery, starts):
+    """
+    Distances to people that each have several embeddings. ``gallery``
+    holds every person's embeddings contiguously, person ``j`` starting at
+    row ``starts[j]``; each person needs at least one row.
+
+    Returns:
+        np.ndarray (len(faces), len(starts)): the distance from each face
+        to the closest embedding of each person
+    """
+    if len(starts) == 0:
+        return np.empty((len(faces), 0), dtype=np.float32)
+    return np.minimum.reduceat(distance_matrix(faces, gallery), starts, axis=1)
+
+
+def assign_one_to_one(distances, threshold):
+    """
+    Greedy one-to-one assignment: repeatedly takes the closest remaining
+    (face, person) pair under ``threshold``, so no face marks two people
+    and no person is matched by two faces.
+
+    Returns:
+        list of (face_index, roster_index, distance), closest first
+    """
+    if distances.size == 0:
+        return []
+
+    face_indices, roster_indices = np.nonzero(distances <= threshold)
+    order = np.argsort(distances[face_indices, roster_indices], kind="stable")
+
+    used_faces = set()
+    used_roster = set()
+    matches = []
+    for position in order:
+        face_index = int(face_indices[position])
+        roster_index = int(roster_indices[position])
+        if face_index in used_faces or roster_index in used_roster:
+            continue
+        used_faces.add(face_index)
+        used_roster.add(roster_index)
+        matches.append((face_index, roster_index, float(distances[face_index, roster_index])))
+    return matches
+
+
+def pair_distances(embeddings, labels):
+    """
+    Distances between every pair of embeddings, split by whether the two
+    share a label.
+
+    Returns:
+        (genuine, impostor) np.ndarrays of distances
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    labels = np.asarray(labels)
+    genuine, impostor = [], []
+    for i in range(len(labels) - 1):
+        distances = distance_matrix(embeddings[i:i + 1], embeddings[i + 1:])[0]
+        same = labels[i + 1:] == labels[i]
+        genuine.append(distances[same])
+        impostor.append(distances[~same])
+    if not genuine:
+        return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.float32)
+    return np.concatenate(genuine), np.concatenate(impostor)
+
+
+def equal_error_threshold(genuine, impostor):
+    """
+    The threshold where the false reject rate (genuine distances above it)
+    and the false accept rate (impostor distances at or below it) are
+    closest, found with one sweep over the sorted distances.
+
+    Returns:
+        (threshold, false reject rate, false accept rate), or None when
+        either set of distances is empty
+    """
+    genuine = np.sort(np.asarray(genuine, dtype=np.float64))
+    impostor = np.sort(np.asarray(impostor, dtype=np.float64))
+    if not genuine.size or not impostor.size:
+        return None
+
+    candidates = np.unique(np.concatenate([genuine, impostor]))
+    frr = 1.0 - np.searchsorted(genuine, candidates, side="right") / genuine.size
+    far = np.searchsorted(impostor, candidates, side="right") / impostor.size
+    best = int(np.argmin(np.abs(frr - far)))
+    return float(candidates[best]), float(frr[best]), float(far[best])
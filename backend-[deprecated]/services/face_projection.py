@@ -0,0 +1,85 @@
+"""
+Projection of 512-d ArcFace embeddings to the 128-d stored vectors.
+
+Without a projection file the first 128 dimensions are kept. A projection
+is fitted offline (`python manage.py fit_face_projection`) and shipped as
+a float32 ``.npy`` array of shape (513, 128): rows 0-511 are the weights,
+row 512 the bias, so applying it is one matmul:
+
+    projected = normalize(embedding) @ weights + bias
+
+Vectors from different projections live in different spaces, so each
+projection has its own version tag, derived from the file contents.
+"""
+
+import hashlib
+
+import numpy as np
+
+INPUT_DIMENSIONS = 512
+OUTPUT_DIMENSIONS = 128
+
+
+class Projection:
+
+    def __init__(self, matrix):
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if matrix.shape != (INPUT_DIMENSIONS + 1, OUTPUT_DIMENSIONS):
+            raise ValueError(
+                f"Projection must have shape {(INPUT_DIMENSIONS + 1, OUTPUT_DIMENSIONS)}, "
+                f"got {matrix.shape}"
+            )
+        self.weights = np.ascontiguousarray(matrix[:INPUT_DIMENSIONS])
+        self.bias = np.ascontiguousarray(matrix[INPUT_DIMENSIONS])
+        self.version = "proj-" + hashlib.sha256(matrix.tobytes()).hexdigest()[:8]
+
+    def apply(self, embeddings):
+        """
+        ``embeddings`` is one raw embedding (512,) or a batch (n, 512).
+
+        Returns:
+            un-normalized projected embeddings, (128,) or (n, 128)
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+        return (embeddings / np.maximum(norms, 1e-12)) @ self.weights + self.bias
+
+
+def load_projection(path):
+    return Projection(np.load(path))
+
+
+def fit_pca(embeddings):
+    """
+    PCA on L2-normalized raw embeddings: keeps the 128 directions that
+    vary most between faces, instead of 128 arbitrary dimensions.
+
+    Returns:
+        (matrix (513, 128), explained variance ratio of the kept components)
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float64)
+    embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    if len(embeddings) < OUTPUT_DIMENSIONS:
+        raise ValueError(
+            f"PCA needs at least {OUTPUT_DIMENSIONS} embeddings, got {len(embeddings)}"
+        )
+
+    mean = embeddings.mean(axis=0)
+    _, singular_values, components = np.linalg.svd(embeddings - mean, full_matrices=False)
+    weights = components[:OUTPUT_DIMENSIONS].T
+    variance = singular_values ** 2
+    explained = float(variance[:OUTPUT_DIMENSIONS].sum() / variance.sum())
+
+    matrix = np.vstack([weights, -mean @ weights]).astype(np.float32)
+    return matrix, explained
+
+
+def fit_random(seed=0):
+    """
+    Gaussian random projection: needs no training data and preserves
+    distances approximately (Johnson-Lindenstrauss), but separates less
+    than PCA.
+    """
+    rng = np.random.default_rng(seed)
+    weights = rng.standard_normal((INPUT_DIMENSIONS, OUTPUT_DIMENSIONS)) / np.sqrt(OUTPUT_DIMENSIONS)
+    return np.vstack([weights, np.zeros(OUTPUT_DIMENSIONS)]).astype(np.float32)
@@ -1,10 +1,34 @@
 import io
+import logging
+import os
+import threading
+import time
+import zipfile
 from functools import lru_cache
 
 import numpy as np
-from PIL import Image
-from deepface import DeepFace
-import os
+from PIL import Image, ImageOps
+from django.conf import settings
+
+from services.embedding_cache import EmbeddingCache
+from services.face_batching import EmbeddingBatcher
+from services.face_engines import build_engine, cascade_stats  # noqa: F401
+from services.face_projection import INPUT_DIMENSIONS, load_projection
+from services.face_quality import (
+    REASON_INFERENCE_UNAVAILABLE,
+    REASON_NO_FACE,
+    REASON_UNREADABLE,
+    check_quality,
+    frame_score,
+    measure_quality,
+    quality_reason,
+)
+from services.face_server import FaceInferenceError, embed_remote, ping_remote
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever preprocessing or post-processing changes the embedding space.
+EMBEDDING_VERSION = "v1"
 
 
 @lru_cache(maxsize=1)
@@ -17,86 +41,540 @@ def _get_model_kwargs():
     }
 
 
-def _load_image_np(image_file):
-    file_bytes = image_file.read()
-    if not file_bytes:
+@lru_cache(maxsize=1)
+def get_detector_cascade():
+    """
+    Detector backends to try in order, e.g. ("opencv", "retinaface").
+    Later stages run only when every earlier stage found no face.
+    """
+    configured = getattr(settings, "FACE_DETECTOR_CASCADE", None)
+    if not configured:
+        return (_get_model_kwargs()["detector_backend"],)
+    if isinstance(configured, str):
+        configured = configured.split(",")
+    return tuple(stage.strip() for stage in configured if stage.strip())
+
+
+def _decode_image_bgr(file_bytes, max_side=None):
+    """
+    Decodes an upload straight to a BGR array no larger than
+    FACE_DECODE_MAX_SIDE on its longest side.
+
+    JPEGs are decoded at a reduced scale by libjpeg (draft mode), EXIF
+    orientation is applied, and the pixel buffer is packed as BGR in one
+    step. The returned array is read-only.
+
+    Returns:
+        np.ndarray (h, w, 3) uint8, or None if the image is unreadable
+        or larger than FACE_DECODE_MAX_PIXELS
+    """
+    if max_side is None:
+        max_side = getattr(settings, "FACE_DECODE_MAX_SIDE", 1024)
+    max_pixels = getattr(settings, "FACE_DECODE_MAX_PIXELS", 40_000_000)
+
+    try:
+        pil_img = Image.open(io.BytesIO(file_bytes))
+
+        # Only the header has been read so far.
+        width, height = pil_img.size
+        if width * height > max_pixels:
+            return None
+
+        if max_side:
+            pil_img.draft("RGB", (max_side, max_side))
+
+        pil_img = ImageOps.exif_transpose(pil_img)
+
+        if max_side and max(pil_img.size) > max_side:
+            pil_img.thumbnail((max_side, max_side), Image.Resampling.BILINEAR)
+
+        if pil_img.mode != "RGB":
+            pil_img = pil_img.convert("RGB")
+
+        width, height = pil_img.size
+        return np.frombuffer(pil_img.tobytes("raw", "BGR"), dtype=np.uint8).reshape(
+            height, width, 3
+        )
+    except (OSError, ValueError, Image.DecompressionBombError):
         return None
 
-    pil_img = Image.open(io.BytesIO(file_bytes))
-    if pil_img.mode not in ["RGB", "L"]:
-        pil_img = pil_img.convert("RGB")
-    else:
-        pil_img = pil_img.convert("RGB")
 
-    return np.array(pil_img)
+def _inference_socket():
+    return getattr(settings, "FACE_INFERENCE_SOCKET", None)
 
 
-def has_face(image_file):
+@lru_cache(maxsize=1)
+def get_engine():
+    """The embedding engine selected by FACE_EMBEDDING_ENGINE."""
+    model_kwargs = _get_model_kwargs()
+    return build_engine(
+        getattr(settings, "FACE_EMBEDDING_ENGINE", "deepface"),
+        get_detector_cascade(),
+        model_name=model_kwargs["model_name"],
+        enforce_detection=model_kwargs["enforce_detection"],
+    )
+
+
+def embed_local_batch(images_bgr):
     """
+    Runs the detector cascade per image and a single batched forward pass
+    of the configured engine in the current process.
+
     Returns:
-        (has_face: bool, encoding: np.ndarray or None)
+        list with one raw embedding (np.ndarray) or None per input image
     """
-    image_rgb = _load_image_np(image_file)
-    if image_rgb is None:
-        image_file.seek(0)
-        return False, None
+    results = get_engine().embed_batch(images_bgr)
+    if any(result is not None for result in results):
+        _warmup_state["model_loaded"] = True
+    return results
 
-    # DeepFace expects BGR numpy array
-    image_bgr = image_rgb[:, :, ::-1].copy()
 
-    try:
-        representations = DeepFace.represent(img_path=image_bgr, **_get_model_kwargs())
-    except Exception:
-        image_file.seek(0)
-        return False, None
+def embed_all_faces_local(images_bgr):
+    """
+    Returns:
+        list with one list of raw embeddings (one per detected face)
+        per input image
+    """
+    return get_engine().embed_all_faces(images_bgr)
 
-    if not representations:
-        image_file.seek(0)
-        return False, None
 
-    rep = representations[0] if isinstance(representations, list) else representations
-    embedding = rep.get("embedding") if isinstance(rep, dict) else rep
+def embed_local(image_bgr):
+    """
+    Runs ArcFace in the current process, coalescing concurrent calls
+    into micro-batches when FACE_BATCH_WINDOW_MS is set.
 
-    if embedding is None:
-        image_file.seek(0)
-        return False, None
+    Returns:
+        raw embedding as np.ndarray, or None when no face was found
+    """
+    batcher = get_batcher()
+    if batcher is not None:
+        return batcher.submit(
+            image_bgr, timeout=getattr(settings, "FACE_INFERENCE_TIMEOUT", None)
+        )
+    return embed_local_batch([image_bgr])[0]
 
-    embedding_array = np.asarray(embedding, dtype=np.float32)
 
-    # Downsample to 128 dims to match existing DB column size.
-    if embedding_array.size > 128:
+@lru_cache(maxsize=1)
+def get_batcher():
+    window_ms = getattr(settings, "FACE_BATCH_WINDOW_MS", 0)
+    if not window_ms:
+        return None
+    return EmbeddingBatcher(
+        embed_local_batch,
+        window_ms=window_ms,
+        max_batch_size=getattr(settings, "FACE_BATCH_MAX_SIZE", 16),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_projection():
+    """The 512->128 projection from FACE_PROJECTION_PATH, or None to truncate."""
+    path = getattr(settings, "FACE_PROJECTION_PATH", None)
+    if not path:
+        return None
+    return load_projection(path)
+
+
+def embedding_version():
+    """
+    Tag stored with every embedding; vectors with different tags are never
+    compared.
+    """
+    projection = get_projection()
+    if projection is None:
+        return EMBEDDING_VERSION
+    return f"{EMBEDDING_VERSION}+{projection.version}"
+
+
+def _normalize_embedding(embedding_array):
+    projection = get_projection()
+    if projection is not None and embedding_array.size == INPUT_DIMENSIONS:
+        embedding_array = projection.apply(embedding_array)
+    elif embedding_array.size > 128:
+        # Downsample to 128 dims to match existing DB column size.
         embedding_array = embedding_array[:128]
 
     norm = float(np.linalg.norm(embedding_array))
     if norm == 0.0:
-        image_file.seek(0)
-        return False, None
+        return None
+
+    return embedding_array / norm
+
+
+def embedding_signature():
+    """Identifies the model configuration that produced an embedding."""
+    engine = getattr(settings, "FACE_EMBEDDING_ENGINE", "deepface")
+    if engine == "onnx":
+        engine = "onnx-" + getattr(settings, "FACE_ONNX_PRECISION", "fp32")
+
+    return "{}:{}:{}:{}".format(
+        _get_model_kwargs()["model_name"],
+        engine,
+        "+".join(get_detector_cascade()),
+        embedding_version(),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_embedding_cache():
+    return EmbeddingCache(
+        max_entries=getattr(settings, "FACE_EMBEDDING_CACHE_SIZE", 1024),
+        ttl=getattr(settings, "FACE_EMBEDDING_CACHE_TTL", 600),
+        alias=getattr(settings, "FACE_EMBEDDING_CACHE_ALIAS", None),
+    )
+
+
+def _embed(image_bgr):
+    socket_path = _inference_socket()
+    if socket_path:
+        return embed_remote(
+            image_bgr,
+            socket_path=socket_path,
+            timeout=getattr(settings, "FACE_INFERENCE_TIMEOUT", 10.0),
+        )
+    return embed_local(image_bgr)
+
+
+def _quality_thresholds():
+    return {
+        "min_brightness": getattr(settings, "FACE_QUALITY_MIN_BRIGHTNESS", 40),
+        "max_brightness": getattr(settings, "FACE_QUALITY_MAX_BRIGHTNESS", 220),
+        "min_sharpness": getattr(settings, "FACE_QUALITY_MIN_SHARPNESS", 40),
+        "min_face_px": getattr(settings, "FACE_QUALITY_MIN_FACE_PX", 96),
+    }
+
+
+def _check_quality(image_bgr):
+    if not getattr(settings, "FACE_QUALITY_CHECK", True):
+        return None
+    return check_quality(image_bgr, **_quality_thresholds())
+
+
+def _embed_and_cache(image_bgr, cache_key):
+    try:
+        embedding = _embed(image_bgr)
+    except (FaceInferenceError, TimeoutError) as e:
+        # Not a property of the image, so nothing is cached.
+        logger.warning("Face inference unavailable: %s", e)
+        return None, REASON_INFERENCE_UNAVAILABLE
+    except Exception:
+        # Engine errors (a model that fails to load, a broken runtime) are
+        # not a property of the image either.
+        logger.exception("Face inference failed")
+        return None, REASON_INFERENCE_UNAVAILABLE
 
-    embedding_array = embedding_array / norm
+    embedding_array = None
+    if embedding is not None:
+        embedding_array = _normalize_embedding(embedding)
 
+    get_embedding_cache().set(cache_key, embedding_array)
+    if embedding_array is None:
+        return None, REASON_NO_FACE
+    return embedding_array, None
+
+
+def analyze_face(image_file):
+    """
+    Returns:
+        (encoding: np.ndarray or None, reason: str or None)
+        reason is one of the REASON_* codes in services.face_quality
+        whenever encoding is None
+    """
+    file_bytes = image_file.read()
     image_file.seek(0)
-    return True, embedding_array
+    if not file_bytes:
+        return None, REASON_UNREADABLE
+
+    cache = get_embedding_cache()
+    cache_key = cache.key(file_bytes, embedding_signature())
+    hit, embedding_array = cache.get(cache_key)
+    if hit:
+        return embedding_array, None if embedding_array is not None else REASON_NO_FACE
+
+    # DeepFace expects BGR numpy array
+    image_bgr = _decode_image_bgr(file_bytes)
+    if image_bgr is None:
+        return None, REASON_UNREADABLE
+
+    reason = _check_quality(image_bgr)
+    if reason:
+        return None, reason
+
+    return _embed_and_cache(image_bgr, cache_key)
+
+
+def read_burst_frames(uploaded_files):
+    """
+    Collects the frames of a burst upload: any number of image files, or
+    zip archives of images, in upload order.
+
+    Returns:
+        list of bytes, at most FACE_BURST_MAX_FRAMES long
+
+    Raises:
+        ValueError: a zip archive is corrupt or a member is too large
+    """
+    max_frames = getattr(settings, "FACE_BURST_MAX_FRAMES", 8)
+    max_member_bytes = getattr(settings, "FACE_BURST_MAX_FRAME_BYTES", 10 * 1024 * 1024)
+
+    frames = []
+    for uploaded in uploaded_files:
+        data = uploaded.read()
+        uploaded.seek(0)
+        if not zipfile.is_zipfile(io.BytesIO(data)):
+            frames.append(data)
+            continue
+
+        try:
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                for info in sorted(archive.infolist(), key=lambda i: i.filename):
+                    if info.is_dir():
+                        continue
+                    # Checked before extracting so a zip bomb is never inflated.
+                    if info.file_size > max_member_bytes:
+                        raise ValueError(f"{info.filename} is too large")
+                    frames.append(archive.read(info))
+                    if len(frames) >= max_frames:
+                        break
+        except zipfile.BadZipFile as e:
+            raise ValueError(str(e)) from e
+
+        if len(frames) >= max_frames:
+            break
+
+    return frames[:max_frames]
+
+
+def iter_burst(frames):
+    """
+    Embeds the frames of a burst lazily, best frame first, so the caller can
+    stop as soon as one matches. Every frame is scored by the cheap quality
+    pass; frames that fail it are yielded last, with their reason and
+    without running the model.
+
+    Yields:
+        (encoding: np.ndarray or None, reason: str or None) per frame
+    """
+    cache = get_embedding_cache()
+    signature = embedding_signature()
+    check = getattr(settings, "FACE_QUALITY_CHECK", True)
+    thresholds = _quality_thresholds()
+
+    candidates = []
+    rejected = []
+    for file_bytes in frames:
+        if not file_bytes:
+            rejected.append(REASON_UNREADABLE)
+            continue
+
+        cache_key = cache.key(file_bytes, signature)
+        hit, embedding_array = cache.get(cache_key)
+        if hit:
+            # Already embedded: nothing cheaper to try first.
+            candidates.append((float("inf"), cache_key, None, embedding_array))
+            continue
+
+        image_bgr = _decode_image_bgr(file_bytes)
+        if image_bgr is None:
+            rejected.append(REASON_UNREADABLE)
+            continue
+
+        metrics = measure_quality(image_bgr, min_face_px=thresholds["min_face_px"])
+        reason = quality_reason(metrics, **thresholds) if check else None
+        if reason:
+            rejected.append(reason)
+            continue
+        score = frame_score(metrics, min_face_px=thresholds["min_face_px"])
+        candidates.append((score, cache_key, image_bgr, None))
+
+    candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+    for _, cache_key, image_bgr, embedding_array in candidates:
+        if image_bgr is None:
+            yield embedding_array, None if embedding_array is not None else REASON_NO_FACE
+        else:
+            yield _embed_and_cache(image_bgr, cache_key)
+
+    for reason in rejected:
+        yield None, reason
+
+
+def analyze_group_photos(image_files):
+    """
+    Embeds every face in one or more classroom photos in a single batched
+    pass (one server call per photo in remote mode).
+
+    Returns:
+        np.ndarray (n_faces, 128) of normalized embeddings
+
+    Raises:
+        FaceInferenceError, TimeoutError: inference is unavailable, including
+        engine errors in local mode
+    """
+    max_side = getattr(settings, "FACE_GROUP_DECODE_MAX_SIDE", 2560)
+    images = []
+    for image_file in image_files:
+        image_bgr = _decode_image_bgr(image_file.read(), max_side=max_side)
+        image_file.seek(0)
+        if image_bgr is not None:
+            images.append(image_bgr)
+
+    socket_path = _inference_socket()
+    if socket_path:
+        per_image = [
+            embed_remote(
+                image_bgr,
+                socket_path=socket_path,
+                timeout=getattr(settings, "FACE_INFERENCE_TIMEOUT", 10.0),
+                all_faces=True,
+            )
+            for image_bgr in images
+        ]
+    else:
+        try:
+            per_image = embed_all_faces_local(images) if images else []
+        except Exception as e:
+            logger.exception("Face inference failed")
+            raise FaceInferenceError(str(e)) from e
 
+    encodings = []
+    for embeddings in per_image:
+        for embedding in embeddings:
+            embedding_array = _normalize_embedding(embedding)
+            if embedding_array is not None:
+                encodings.append(embedding_array)
 
-def warmup_face_model():
+    if not encodings:
+        return np.empty((0, 128), dtype=np.float32)
+    return np.stack(encodings).astype(np.float32)
+
+
+def has_face(image_file):
+    """
+    Returns:
+        (has_face: bool, encoding: np.ndarray or None)
+    """
+    embedding_array, _ = analyze_face(image_file)
+    return embedding_array is not None, embedding_array
+
+
+_warmup_state = {
+    "status": "not_started",
+    "model_loaded": False,
+    "latency_ms": None,
+    "error": None,
+}
+_warmup_lock = threading.Lock()
+_warmup_retry = {"failures": 0, "at": 0.0}
+
+_WARMUP_RETRY_MAX_SECONDS = 300.0
+
+
+def warmup_face_model(force_local=False):
     """
     Loads the face model into memory at server startup
     so the first request is fast.
     """
-    try:
+    if _inference_socket() and not force_local:
+        # The inference server owns the model and warms itself up.
+        _warmup_state["status"] = "remote"
+        return
 
+    _warmup_state["status"] = "running"
+    try:
         base_dir = os.path.dirname(os.path.dirname(__file__))
 
         image_path = os.path.join(base_dir, "test_images", "test.jpg")
 
-        DeepFace.represent(
-            img_path=image_path,
-            model_name="ArcFace",         
-            detector_backend="opencv",
-            enforce_detection=True,      
-        )
+        with open(image_path, "rb") as f:
+            image_bgr = _decode_image_bgr(f.read())
+
+        started = time.perf_counter()
+        embedding = embed_local_batch([image_bgr])[0]
+        elapsed_ms = (time.perf_counter() - started) * 1000
 
-        print("✅ Face model warmed up successfully.")
+        if embedding is None:
+            raise ValueError("no face found in the warmup image")
+
+        _warmup_state.update(status="ready", latency_ms=round(elapsed_ms, 1), error=None)
+        _warmup_retry["failures"] = 0
+        logger.info("Face model warmed up in %.0f ms", elapsed_ms)
 
     except Exception as e:
-        print("❌ Face model warmup failed:", e)
+        with _warmup_lock:
+            _warmup_retry["failures"] += 1
+            delay = min(
+                _WARMUP_RETRY_MAX_SECONDS,
+                getattr(settings, "FACE_WARMUP_RETRY_SECONDS", 5.0)
+                * 2 ** (_warmup_retry["failures"] - 1),
+            )
+            _warmup_retry["at"] = time.monotonic() + delay
+            _warmup_state.update(status="failed", error=str(e))
+        logger.exception("Face model warmup failed, retrying in %.0f s", delay)
+
+
+def start_warmup(policy=None):
+    """
+    Applies the FACE_WARMUP policy:
+        eager       load the model before returning (blocks startup)
+        background  load the model in a daemon thread
+        disabled    load lazily on the first inference
+    """
+    policy = (policy or getattr(settings, "FACE_WARMUP", "background")).lower()
+
+    if policy == "disabled":
+        return
+    if policy == "background":
+        ensure_warmup_started()
+        return
+    if policy != "eager":
+        logger.warning("Unknown FACE_WARMUP policy %r, warming up eagerly", policy)
+    with _warmup_lock:
+        _warmup_state["status"] = "running"
+    warmup_face_model()
+
+
+def ensure_warmup_started():
+    """
+    Starts a background warmup unless one has already run or is running.
+    A failed warmup is started again once its backoff has passed, unless
+    a request has loaded the model in the meantime.
+    """
+    with _warmup_lock:
+        status = _warmup_state["status"]
+        if status == "failed":
+            if _warmup_state["model_loaded"] or time.monotonic() < _warmup_retry["at"]:
+                return
+        elif status != "not_started":
+            return
+        _warmup_state["status"] = "running"
+
+    threading.Thread(
+        target=warmup_face_model, name="face-warmup", daemon=True
+    ).start()
+
+
+def model_status():
+    """
+    Returns:
+        dict describing whether this process can serve an inference now
+    """
+    socket_path = _inference_socket()
+    if socket_path:
+        reachable = ping_remote(
+            socket_path, timeout=getattr(settings, "FACE_INFERENCE_PING_TIMEOUT", 0.5)
+        )
+        return {
+            "mode": "remote",
+            "socket": socket_path,
+            "ready": reachable,
+        }
+
+    return local_model_status()
+
+
+def local_model_status():
+    return {
+        "mode": "local",
+        "ready": _warmup_state["model_loaded"],
+        **_warmup_state,
+    }
@@ -0,0 +1,70 @@
+"""
+Worker side of `manage.py reembed_faces`.
+
+Lives outside the command module so that spawned pool processes can
+import it before Django is set up.
+"""
+
+import urllib.request
+
+import numpy as np
+
+_MAX_IMAGE_BYTES = 20 * 1024 * 1024
+
+
+def fetch_image(url, timeout=15.0):
+    """
+    Returns:
+        the image bytes, or None if it could not be downloaded
+    """
+    if not url:
+        return None
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            data = response.read(_MAX_IMAGE_BYTES + 1)
+    except (OSError, ValueError):
+        return None
+    if not data or len(data) > _MAX_IMAGE_BYTES:
+        return None
+    return data
+
+
+def init_worker():
+    import django
+
+    django.setup()
+
+
+def embed_images(items):
+    """
+    ``items`` is a list of (user_id, image bytes or None); None means the
+    picture could not be downloaded.
+
+    Returns:
+        list of (user_id, normalized embedding as a list or None, fetched).
+        ``fetched`` is False when there were no bytes to embed, so callers
+        can retry those users instead of recording them as faceless.
+    """
+    from services.face_recognition import (
+        _decode_image_bgr,
+        _normalize_embedding,
+        embed_local_batch,
+    )
+
+    images = []
+    owners = []
+    for user_id, data in items:
+        image_bgr = _decode_image_bgr(data) if data else None
+        if image_bgr is not None:
+            images.append(image_bgr)
+            owners.append(user_id)
+
+    results = {user_id: None for user_id, _ in items}
+    if images:
+        for user_id, embedding in zip(owners, embed_local_batch(images)):
+            if embedding is None:
+                continue
+            embedding_array = _normalize_embedding(np.asarray(embedding, dtype=np.float32))
+            if embedding_array is not None:
+                results[user_id] = embedding_array.tolist()
+    return [(user_id, results[user_id], data is not None) for user_id, data in items]
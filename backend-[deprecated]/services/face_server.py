@@ -0,0 +1,232 @@
+"""
+Out-of-process face inference.
+
+A single server process (or a small pre-forked pool) owns the ArcFace model.
+Web workers hand over decoded images through ``multiprocessing.shared_memory``
+and talk to the server over a Unix socket, so they never import TensorFlow.
+
+Protocol (one request per connection, newline-delimited JSON):
+    client -> server: {"shm": <segment name>, "shape": [h, w, 3], "dtype": "uint8"}
+    server -> client: {"embedding": [...]} or {"embedding": null, "error": "..."}
+
+    client -> server: {... "all_faces": true}
+    server -> client: {"embeddings": [[...], ...]}   one per detected face
+
+    client -> server: {"ping": true}
+    server -> client: {"ready": <model loaded>}
+"""
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Large enough for a group photo's worth of 512-d embeddings.
+_MAX_MESSAGE_BYTES = 4 * 1024 * 1024
+
+
+class FaceInferenceError(Exception):
+    """The inference server could not be reached or failed to run the model."""
+
+
+# ---------------------------------------------------------
+# Client
+# ---------------------------------------------------------
+def _recv_line(sock):
+    chunks = []
+    received = 0
+    while True:
+        chunk = sock.recv(8192)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        received += len(chunk)
+        if chunk.endswith(b"\n") or received > _MAX_MESSAGE_BYTES:
+            break
+    return b"".join(chunks)
+
+
+def embed_remote(image_bgr, socket_path, timeout=10.0, all_faces=False):
+    """
+    Sends a decoded BGR image to the inference server.
+
+    Returns:
+        raw embedding as np.ndarray, or None when no face was found;
+        with ``all_faces``, a list of raw embeddings for every face
+
+    Raises:
+        FaceInferenceError: the server is unreachable, timed out or failed
+    """
+    image_bgr = np.ascontiguousarray(image_bgr, dtype=np.uint8)
+    shm = shared_memory.SharedMemory(create=True, size=max(image_bgr.nbytes, 1))
+    try:
+        buffer = np.ndarray(image_bgr.shape, dtype=np.uint8, buffer=shm.buf)
+        buffer[...] = image_bgr
+        del buffer
+
+        header = {
+            "shm": shm.name,
+            "shape": list(image_bgr.shape),
+            "dtype": "uint8",
+            "all_faces": all_faces,
+        }
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(socket_path)
+            sock.sendall(json.dumps(header).encode() + b"\n")
+            reply = json.loads(_recv_line(sock) or b"{}")
+    except (OSError, ValueError) as e:
+        raise FaceInferenceError(f"Face inference server call failed: {e}") from e
+    finally:
+        shm.close()
+        shm.unlink()
+
+    if reply.get("error"):
+        raise FaceInferenceError(reply["error"])
+
+    if all_faces:
+        return [np.asarray(e, dtype=np.float32) for e in reply.get("embeddings") or []]
+
+    embedding = reply.get("embedding")
+    if embedding is None:
+        return None
+    return np.asarray(embedding, dtype=np.float32)
+
+
+def ping_remote(socket_path, timeout=1.0):
+    """Returns True when the inference server is up and its model is loaded."""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(socket_path)
+            sock.sendall(b'{"ping": true}\n')
+            reply = json.loads(_recv_line(sock) or b"{}")
+    except (OSError, ValueError):
+        return False
+    return bool(reply.get("ready"))
+
+
+# ---------------------------------------------------------
+# Server
+# ---------------------------------------------------------
+class _InferenceHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        try:
+            header = json.loads(self.rfile.readline(_MAX_MESSAGE_BYTES))
+            if header.get("ping"):
+                self._reply({"ready": self.server.is_ready()})  # type: ignore[attr-defined]
+                return
+            shape = tuple(int(n) for n in header["shape"])
+            segment = header["shm"]
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            self._reply({"embedding": None, "error": f"bad request: {e}"})
+            return
+
+        try:
+            shm = shared_memory.SharedMemory(name=segment)
+        except FileNotFoundError:
+            self._reply({"embedding": None, "error": "shared memory segment not found"})
+            return
+
+        # The client owns the segment; stop the tracker from unlinking it
+        # when this process exits.
+        resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+
+        try:
+            image_bgr = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+            if header.get("all_faces"):
+                embeddings = self.server.embed_all(image_bgr)  # type: ignore[attr-defined]
+                payload = {"embeddings": [e.tolist() for e in embeddings]}
+            else:
+                embedding = self.server.embed(image_bgr)  # type: ignore[attr-defined]
+                payload = {"embedding": embedding.tolist() if embedding is not None else None}
+            del image_bgr
+        except Exception as e:
+            logger.exception("Face inference failed")
+            self._reply({"embedding": None, "error": str(e)})
+            return
+        finally:
+            shm.close()
+
+        self._reply(payload)
+
+    def _reply(self, payload):
+        self.wfile.write(json.dumps(payload).encode() + b"\n")
+
+
+class FaceInferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, _InferenceHandler)
+        os.chmod(socket_path, 0o660)
+        self._lock = threading.Lock()
+
+    def is_ready(self):
+        from services.face_recognition import local_model_status
+
+        return local_model_status()["ready"]
+
+    def embed(self, image_bgr):
+        from services.face_recognition import embed_local, get_batcher
+
+        # With batching enabled, concurrent connections are coalesced into
+        # one forward pass by the batcher thread. Otherwise run one forward
+        # pass at a time per process; more throughput comes from more workers.
+        if get_batcher() is not None:
+            return embed_local(image_bgr)
+        with self._lock:
+            return embed_local(image_bgr)
+
+    def embed_all(self, image_bgr):
+        from services.face_recognition import embed_all_faces_local
+
+        with self._lock:
+            return embed_all_faces_local([image_bgr])[0]
+
+
+def serve(socket_path, workers=1):
+    """
+    Binds the socket once and serves it from ``workers`` processes.
+
+    The model is loaded after forking so each worker owns exactly one copy.
+    """
+    from services.face_recognition import warmup_face_model
+
+    server = FaceInferenceServer(socket_path)
+    children = []
+
+    for _ in range(max(1, workers) - 1):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                warmup_face_model(force_local=True)
+                server.serve_forever()
+            finally:
+                os._exit(0)
+        children.append(pid)
+
+    try:
+        warmup_face_model(force_local=True)
+        server.serve_forever()
+    finally:
+        server.server_close()
+        for pid in children:
+            try:
+                os.kill(pid, 15)
+                os.waitpid(pid, 0)
+            except OSError:
+                pass
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
@@ -0,0 +1,65 @@
+import numpy as np
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from services.embedding_cache import EmbeddingCache
+
+
+class EmbeddingCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_key_depends_on_content_and_signature(self):
+        key = EmbeddingCache.key(b"image", "ArcFace:fake:opencv:v1")
+
+        self.assertEqual(key, EmbeddingCache.key(b"image", "ArcFace:fake:opencv:v1"))
+        self.assertNotEqual(key, EmbeddingCache.key(b"other", "ArcFace:fake:opencv:v1"))
+        self.assertNotEqual(key, EmbeddingCache.key(b"image", "ArcFace:onnx-int8:opencv:v1"))
+
+    def test_round_trip(self):
+        embeddings = EmbeddingCache()
+        vector = np.arange(128, dtype=np.float32)
+
+        self.assertEqual(embeddings.get("key"), (False, None))
+        embeddings.set("key", vector)
+        hit, cached = embeddings.get("key")
+
+        self.assertTrue(hit)
+        np.testing.assert_array_equal(cached, vector)
+        self.assertEqual(embeddings.stats()["hits"], 1)
+        self.assertEqual(embeddings.stats()["misses"], 1)
+
+    def test_no_face_is_a_hit(self):
+        embeddings = EmbeddingCache()
+        embeddings.set("key", None)
+
+        self.assertEqual(embeddings.get("key"), (True, None))
+
+    def test_entries_expire(self):
+        embeddings = EmbeddingCache(ttl=0)
+        embeddings.set("key", np.zeros(128, dtype=np.float32))
+
+        self.assertEqual(embeddings.get("key"), (False, None))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        embeddings = EmbeddingCache(max_entries=2)
+        for key in ("a", "b"):
+            embeddings.set(key, np.zeros(128, dtype=np.float32))
+        embeddings.get("a")
+        embeddings.set("c", np.zeros(128, dtype=np.float32))
+
+        self.assertTrue(embeddings.get("a")[0])
+        self.assertFalse(embeddings.get("b")[0])
+        self.assertTrue(embeddings.get("c")[0])
+
+    def test_shared_alias_is_seen_by_other_processes(self):
+        vector = np.ones(128, dtype=np.float32)
+        EmbeddingCache(alias="default").set("key", vector)
+
+        other = EmbeddingCache(alias="default")
+        hit, cached = other.get("key")
+
+        self.assertTrue(hit)
+        np.testing.assert_array_equal(cached, vector)
+        self.assertEqual(other.stats()["shared_hits"], 1)
@@ -0,0 +1,78 @@
+import threading
+
+from django.test import SimpleTestCase
+
+from services.face_batching import EmbeddingBatcher
+
+
+def _submit_all(batcher, images, timeout=5):
+    results = [None] * len(images)
+    errors = [None] * len(images)
+
+    def submit(index):
+        try:
+            results[index] = batcher.submit(images[index], timeout=timeout)
+        except Exception as e:
+            errors[index] = e
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(len(images))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+class EmbeddingBatcherTests(SimpleTestCase):
+
+    def test_concurrent_requests_share_a_batch(self):
+        sizes = []
+
+        def embed_batch(images):
+            sizes.append(len(images))
+            return [image * 10 for image in images]
+
+        # A long window: the batch is dispatched once it is full.
+        batcher = EmbeddingBatcher(embed_batch, window_ms=5000, max_batch_size=4)
+        results, errors = _submit_all(batcher, [1, 2, 3, 4])
+
+        self.assertEqual(errors, [None] * 4)
+        self.assertEqual(results, [10, 20, 30, 40])
+        self.assertEqual(sizes, [4])
+        self.assertEqual(batcher.stats()["mean_batch_size"], 4.0)
+
+    def test_lone_request_is_dispatched_after_the_window(self):
+        batcher = EmbeddingBatcher(lambda images: list(images), window_ms=10, max_batch_size=16)
+
+        self.assertEqual(batcher.submit("image", timeout=5), "image")
+        self.assertEqual(batcher.stats()["batches"], 1)
+
+    def test_errors_reach_every_caller_of_the_batch(self):
+        def embed_batch(images):
+            raise RuntimeError("model failed to load")
+
+        batcher = EmbeddingBatcher(embed_batch, window_ms=5000, max_batch_size=2)
+        with self.assertLogs("services.face_batching", "ERROR"):
+            results, errors = _submit_all(batcher, [1, 2])
+
+        self.assertEqual(results, [None, None])
+        for error in errors:
+            self.assertIsInstance(error, RuntimeError)
+
+        # The worker survives a failed batch.
+        batcher._embed_batch = lambda images: list(images)
+        self.assertEqual(_submit_all(batcher, [3, 4]), ([3, 4], [None, None]))
+
+    def test_submit_times_out(self):
+        release = threading.Event()
+
+        def embed_batch(images):
+            release.wait(5)
+            return list(images)
+
+        batcher = EmbeddingBatcher(embed_batch, window_ms=1, max_batch_size=1)
+        try:
+            with self.assertRaises(TimeoutError):
+                batcher.submit(1, timeout=0.05)
+        finally:
+            release.set()
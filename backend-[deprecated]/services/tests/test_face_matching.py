@@ -0,0 +1,136 @@
+import itertools
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from services.face_matching import (
+    assign_one_to_one,
+    centroid,
+    distance_matrix,
+    equal_error_threshold,
+    gallery_distance_matrix,
+    pair_distances,
+)
+
+
+def unit_vectors(count, dimensions=8, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((count, dimensions)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+class DistanceMatrixTests(SimpleTestCase):
+
+    def test_matches_pairwise_norms(self):
+        faces, roster = unit_vectors(3, seed=1), unit_vectors(5, seed=2)
+
+        expected = np.linalg.norm(faces[:, None, :] - roster[None, :, :], axis=2)
+        np.testing.assert_allclose(distance_matrix(faces, roster), expected, atol=1e-5)
+
+    def test_identical_vectors_are_at_distance_zero(self):
+        faces = unit_vectors(4)
+
+        np.testing.assert_allclose(np.diag(distance_matrix(faces, faces)), 0.0, atol=1e-3)
+
+
+class GalleryTests(SimpleTestCase):
+
+    def test_centroid_is_the_normalized_mean(self):
+        embeddings = unit_vectors(3)
+
+        mean = embeddings.mean(axis=0)
+        np.testing.assert_allclose(centroid(embeddings), mean / np.linalg.norm(mean), rtol=1e-5)
+        np.testing.assert_allclose(centroid(embeddings[:1]), embeddings[0], rtol=1e-5)
+
+    def test_centroid_of_nothing(self):
+        self.assertIsNone(centroid([]))
+
+    def test_distance_to_the_closest_template_of_each_person(self):
+        faces = unit_vectors(2, seed=1)
+        gallery = unit_vectors(5, seed=2)
+        starts = [0, 2, 3]  # person 0: rows 0-1, person 1: row 2, person 2: rows 3-4
+
+        distances = distance_matrix(faces, gallery)
+        expected = np.stack(
+            [distances[:, 0:2].min(axis=1), distances[:, 2], distances[:, 3:5].min(axis=1)],
+            axis=1,
+        )
+        np.testing.assert_allclose(gallery_distance_matrix(faces, gallery, starts), expected)
+
+    def test_empty_gallery(self):
+        self.assertEqual(gallery_distance_matrix(unit_vectors(2), np.empty((0, 8)), []).shape, (2, 0))
+
+
+class AssignOneToOneTests(SimpleTestCase):
+
+    def test_each_face_and_person_is_used_once(self):
+        distances = np.array(
+            [
+                [0.2, 0.3, 1.5],
+                [0.25, 0.9, 1.5],
+                [1.5, 1.5, 1.5],
+            ]
+        )
+
+        matches = assign_one_to_one(distances, threshold=1.0)
+
+        # Face 0 takes person 0 (closest pair); face 1 then only has person 1.
+        self.assertEqual(matches, [(0, 0, 0.2), (1, 1, 0.9)])
+
+    def test_nothing_over_the_threshold_is_matched(self):
+        self.assertEqual(assign_one_to_one(np.full((2, 2), 1.2), threshold=1.0), [])
+
+    def test_empty_roster_or_no_faces(self):
+        self.assertEqual(assign_one_to_one(np.empty((3, 0)), threshold=1.0), [])
+        self.assertEqual(assign_one_to_one(np.empty((0, 3)), threshold=1.0), [])
+
+    def test_more_faces_than_people(self):
+        distances = np.array([[0.5], [0.4], [0.6]])
+
+        self.assertEqual(assign_one_to_one(distances, threshold=1.0), [(1, 0, 0.4)])
+
+
+class EqualErrorTests(SimpleTestCase):
+
+    def test_pair_distances_split_by_label(self):
+        embeddings = unit_vectors(6)
+        labels = ["a", "a", "b", "b", "b", "c"]
+
+        genuine, impostor = pair_distances(embeddings, labels)
+
+        expected = {True: [], False: []}
+        for i, j in itertools.combinations(range(6), 2):
+            distance = float(np.linalg.norm(embeddings[i] - embeddings[j]))
+            expected[labels[i] == labels[j]].append(distance)
+        np.testing.assert_allclose(np.sort(genuine), np.sort(expected[True]), atol=1e-5)
+        np.testing.assert_allclose(np.sort(impostor), np.sort(expected[False]), atol=1e-5)
+
+    def test_pair_distances_of_a_single_embedding(self):
+        genuine, impostor = pair_distances(unit_vectors(1), ["a"])
+
+        self.assertEqual((genuine.size, impostor.size), (0, 0))
+
+    def test_separable_distances(self):
+        threshold, frr, far = equal_error_threshold([0.2, 0.3, 0.4], [0.9, 1.0, 1.1])
+
+        self.assertEqual((frr, far), (0.0, 0.0))
+        self.assertGreaterEqual(threshold, 0.4)
+        self.assertLess(threshold, 0.9)
+
+    def test_matches_the_exhaustive_search(self):
+        rng = np.random.default_rng(1)
+        genuine = rng.normal(0.7, 0.15, 300)
+        impostor = rng.normal(1.1, 0.15, 2000)
+
+        threshold, frr, far = equal_error_threshold(genuine, impostor)
+
+        candidates = np.unique(np.concatenate([genuine, impostor]))
+        expected = min(
+            candidates, key=lambda t: abs(np.mean(genuine > t) - np.mean(impostor <= t))
+        )
+        self.assertEqual(threshold, float(expected))
+        self.assertAlmostEqual(frr, float(np.mean(genuine > threshold)))
+        self.assertAlmostEqual(far, float(np.mean(impostor <= threshold)))
+
+    def test_needs_both_kinds_of_pairs(self):
+        self.assertIsNone(equal_error_threshold([0.5], []))
+        self.assertIsNone(equal_error_threshold([], [0.5]))
@@ -0,0 +1,71 @@
+import os
+import tempfile
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from services.face_projection import (
+    INPUT_DIMENSIONS,
+    OUTPUT_DIMENSIONS,
+    Projection,
+    fit_pca,
+    fit_random,
+    load_projection,
+)
+
+
+def raw_embeddings(count, seed=0):
+    return np.random.default_rng(seed).standard_normal((count, INPUT_DIMENSIONS)).astype(np.float32)
+
+
+class ProjectionTests(SimpleTestCase):
+
+    def test_rejects_a_matrix_of_the_wrong_shape(self):
+        with self.assertRaises(ValueError):
+            Projection(np.zeros((INPUT_DIMENSIONS, OUTPUT_DIMENSIONS)))
+
+    def test_applies_to_one_embedding_or_a_batch(self):
+        projection = Projection(fit_random(seed=0))
+        embeddings = raw_embeddings(4)
+
+        batch = projection.apply(embeddings)
+        self.assertEqual(batch.shape, (4, OUTPUT_DIMENSIONS))
+        np.testing.assert_allclose(projection.apply(embeddings[0]), batch[0], rtol=1e-5, atol=1e-6)
+
+    def test_input_scale_does_not_matter(self):
+        projection = Projection(fit_random(seed=0))
+        embedding = raw_embeddings(1)[0]
+
+        np.testing.assert_allclose(
+            projection.apply(embedding), projection.apply(embedding * 7.0), rtol=1e-5, atol=1e-6
+        )
+
+    def test_version_follows_the_matrix(self):
+        self.assertEqual(Projection(fit_random(seed=0)).version, Projection(fit_random(seed=0)).version)
+        self.assertNotEqual(Projection(fit_random(seed=0)).version, Projection(fit_random(seed=1)).version)
+
+    def test_saved_projection_loads_with_the_same_version(self):
+        matrix = fit_random(seed=3)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "projection.npy")
+            np.save(path, matrix)
+            self.assertEqual(load_projection(path).version, Projection(matrix).version)
+
+
+class FitPcaTests(SimpleTestCase):
+
+    def test_needs_enough_embeddings(self):
+        with self.assertRaises(ValueError):
+            fit_pca(raw_embeddings(OUTPUT_DIMENSIONS - 1))
+
+    def test_projection_is_centred_and_keeps_most_variance_of_low_rank_data(self):
+        rng = np.random.default_rng(0)
+        # 600 faces that vary along 64 directions only.
+        embeddings = rng.standard_normal((600, 64)) @ rng.standard_normal((64, INPUT_DIMENSIONS))
+
+        matrix, explained = fit_pca(embeddings)
+        projected = Projection(matrix).apply(embeddings)
+
+        self.assertEqual(matrix.shape, (INPUT_DIMENSIONS + 1, OUTPUT_DIMENSIONS))
+        self.assertGreater(explained, 0.999)
+        np.testing.assert_allclose(projected.mean(axis=0), 0.0, atol=1e-4)
@@ -0,0 +1,76 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from services.face_quality import (
+    REASON_FACE_TOO_SMALL,
+    REASON_TOO_BLURRY,
+    REASON_TOO_BRIGHT,
+    REASON_TOO_DARK,
+    _HAAR_WINDOW_PX,
+    _analysis_scale,
+    frame_score,
+    measure_quality,
+    quality_reason,
+)
+
+
+def metrics(brightness=120.0, sharpness=200.0, face_px=200):
+    return {"brightness": brightness, "sharpness": sharpness, "face_px": face_px}
+
+
+class QualityReasonTests(SimpleTestCase):
+
+    def test_good_frame_passes(self):
+        self.assertIsNone(quality_reason(metrics()))
+
+    def test_reasons(self):
+        self.assertEqual(quality_reason(metrics(brightness=10)), REASON_TOO_DARK)
+        self.assertEqual(quality_reason(metrics(brightness=250)), REASON_TOO_BRIGHT)
+        self.assertEqual(quality_reason(metrics(face_px=60)), REASON_FACE_TOO_SMALL)
+        self.assertEqual(quality_reason(metrics(sharpness=5)), REASON_TOO_BLURRY)
+
+    def test_thresholds_are_configurable(self):
+        self.assertIsNone(quality_reason(metrics(face_px=60), min_face_px=48))
+        self.assertEqual(quality_reason(metrics(sharpness=80), min_sharpness=100), REASON_TOO_BLURRY)
+
+    def test_no_face_found_is_left_to_the_detector(self):
+        self.assertIsNone(quality_reason(metrics(face_px=None)))
+
+
+class FrameScoreTests(SimpleTestCase):
+
+    def test_sharper_and_larger_faces_rank_higher(self):
+        self.assertGreater(frame_score(metrics(sharpness=400)), frame_score(metrics(sharpness=100)))
+        self.assertGreater(frame_score(metrics(face_px=150)), frame_score(metrics(face_px=100)))
+
+    def test_face_size_stops_counting_at_twice_the_minimum(self):
+        self.assertEqual(
+            frame_score(metrics(face_px=192), min_face_px=96),
+            frame_score(metrics(face_px=400), min_face_px=96),
+        )
+
+    def test_frames_without_a_face_rank_last(self):
+        self.assertLess(
+            frame_score(metrics(sharpness=10_000, face_px=None)),
+            frame_score(metrics(sharpness=1, face_px=97)),
+        )
+
+
+class AnalysisScaleTests(SimpleTestCase):
+
+    def test_faces_below_the_threshold_can_be_detected(self):
+        for side in (640, 1024, 4000):
+            for min_face_px in (64, 96, 160):
+                scale = _analysis_scale(side, side * 3 // 4, min_face_px)
+                self.assertLess(_HAAR_WINDOW_PX / scale, min_face_px)
+
+    def test_small_images_are_not_upscaled(self):
+        self.assertEqual(_analysis_scale(200, 150, 96), 1.0)
+
+    def test_measures_a_frame(self):
+        image = np.random.default_rng(0).integers(0, 256, (768, 1024, 3), dtype=np.uint8)
+
+        measured = measure_quality(image)
+
+        self.assertGreater(measured["brightness"], 100)
+        self.assertGreater(measured["sharpness"], 0)
@@ -0,0 +1,199 @@
+import io
+from unittest import mock
+
+import numpy as np
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+
+from services import face_recognition
+from services.face_quality import (
+    REASON_INFERENCE_UNAVAILABLE,
+    REASON_NO_FACE,
+    REASON_TOO_DARK,
+    REASON_UNREADABLE,
+)
+
+
+def jpeg_bytes(seed=0, size=(160, 120)):
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 256, size=(size[1], size[0], 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+@override_settings(
+    FACE_EMBEDDING_ENGINE="fake",
+    FACE_INFERENCE_SOCKET=None,
+    FACE_BATCH_WINDOW_MS=0,
+    FACE_QUALITY_CHECK=False,
+    FACE_PROJECTION_PATH=None,
+    FACE_EMBEDDING_CACHE_ALIAS=None,
+)
+class FaceRecognitionTestCase(SimpleTestCase):
+
+    def setUp(self):
+        for cached in (
+            face_recognition.get_engine,
+            face_recognition.get_batcher,
+            face_recognition.get_projection,
+            face_recognition.get_embedding_cache,
+        ):
+            cached.cache_clear()
+        self.addCleanup(face_recognition.get_engine.cache_clear)
+        self.addCleanup(face_recognition.get_embedding_cache.cache_clear)
+
+
+class AnalyzeFaceTests(FaceRecognitionTestCase):
+
+    def test_embeds_with_the_fake_engine(self):
+        encoding, reason = face_recognition.analyze_face(SimpleUploadedFile("a.jpg", jpeg_bytes()))
+
+        self.assertIsNone(reason)
+        self.assertEqual(encoding.shape, (128,))
+        self.assertAlmostEqual(float(np.linalg.norm(encoding)), 1.0, places=5)
+
+    def test_engine_errors_are_reported_as_inference_unavailable(self):
+        data = jpeg_bytes()
+        with mock.patch.object(
+            face_recognition, "_embed", side_effect=RuntimeError("requires onnxruntime")
+        ):
+            with self.assertLogs("services.face_recognition", "ERROR"):
+                encoding, reason = face_recognition.analyze_face(SimpleUploadedFile("a.jpg", data))
+
+        self.assertIsNone(encoding)
+        self.assertEqual(reason, REASON_INFERENCE_UNAVAILABLE)
+        # Not cached: the next attempt runs the model again.
+        cache = face_recognition.get_embedding_cache()
+        hit, _ = cache.get(cache.key(data, face_recognition.embedding_signature()))
+        self.assertFalse(hit)
+
+    def test_group_photo_engine_errors_raise_inference_error(self):
+        with mock.patch.object(
+            face_recognition, "embed_all_faces_local", side_effect=RuntimeError("boom")
+        ):
+            with self.assertLogs("services.face_recognition", "ERROR"):
+                with self.assertRaises(face_recognition.FaceInferenceError):
+                    face_recognition.analyze_group_photos([SimpleUploadedFile("a.jpg", jpeg_bytes())])
+
+    def test_no_face_is_cached(self):
+        blank = io.BytesIO()
+        Image.new("RGB", (64, 64), (128, 128, 128)).save(blank, format="PNG")
+
+        first = face_recognition.analyze_face(SimpleUploadedFile("a.png", blank.getvalue()))
+        with mock.patch.object(face_recognition, "_embed") as embed:
+            second = face_recognition.analyze_face(SimpleUploadedFile("a.png", blank.getvalue()))
+
+        self.assertEqual(first, (None, REASON_NO_FACE))
+        self.assertEqual(second, (None, REASON_NO_FACE))
+        embed.assert_not_called()
+
+
+def quality(sharpness, brightness=120.0, face_px=200):
+    return {"brightness": brightness, "sharpness": sharpness, "face_px": face_px}
+
+
+@override_settings(FACE_QUALITY_CHECK=True)
+class IterBurstTests(FaceRecognitionTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # Frame sizes tell the frames apart once decoded.
+        self.frames = [
+            jpeg_bytes(seed, size)
+            for seed, size in enumerate([(160, 120), (200, 150), (240, 180)])
+        ]
+        self.vector = np.ones(128, dtype=np.float32)
+
+    def embedded_widths(self, embed):
+        return [call.args[0].shape[1] for call in embed.call_args_list]
+
+    def test_frames_are_embedded_best_first_and_lazily(self):
+        scores = [quality(50), quality(400), quality(100)]
+        with mock.patch.object(face_recognition, "measure_quality", side_effect=scores):
+            with mock.patch.object(face_recognition, "_embed", return_value=self.vector) as embed:
+                burst = face_recognition.iter_burst(self.frames)
+                encoding, reason = next(burst)
+                self.assertIsNone(reason)
+                self.assertEqual(self.embedded_widths(embed), [200])
+
+                self.assertEqual(len(list(burst)), 2)
+                self.assertEqual(self.embedded_widths(embed), [200, 240, 160])
+
+    def test_rejected_frames_come_last_without_inference(self):
+        scores = [quality(50, brightness=5), quality(400), quality(100)]
+        frames = self.frames + [b"not an image"]
+        with mock.patch.object(face_recognition, "measure_quality", side_effect=scores):
+            with mock.patch.object(face_recognition, "_embed", return_value=self.vector) as embed:
+                reasons = [reason for _, reason in face_recognition.iter_burst(frames)]
+
+        self.assertEqual(reasons, [None, None, REASON_TOO_DARK, REASON_UNREADABLE])
+        self.assertEqual(self.embedded_widths(embed), [200, 240])
+
+    def test_cached_frames_come_first_without_inference(self):
+        cache = face_recognition.get_embedding_cache()
+        cache.set(cache.key(self.frames[0], face_recognition.embedding_signature()), self.vector)
+
+        scores = [quality(400), quality(100)]
+        with mock.patch.object(face_recognition, "measure_quality", side_effect=scores):
+            with mock.patch.object(face_recognition, "_embed", return_value=self.vector) as embed:
+                burst = face_recognition.iter_burst(self.frames)
+                encoding, _ = next(burst)
+                embed.assert_not_called()
+                np.testing.assert_array_equal(encoding, self.vector)
+
+    def test_inference_errors_are_reported_per_frame(self):
+        with mock.patch.object(face_recognition, "_embed", side_effect=TimeoutError):
+            with self.assertLogs("services.face_recognition", "WARNING"):
+                encoding, reason = next(face_recognition.iter_burst(self.frames[:1]))
+
+        self.assertIsNone(encoding)
+        self.assertEqual(reason, REASON_INFERENCE_UNAVAILABLE)
+
+
+class WarmupRetryTests(SimpleTestCase):
+
+    def setUp(self):
+        state = dict(face_recognition._warmup_state)
+        retry = dict(face_recognition._warmup_retry)
+        self.addCleanup(face_recognition._warmup_state.update, state)
+        self.addCleanup(face_recognition._warmup_retry.update, retry)
+
+    def fail_warmup(self):
+        face_recognition._warmup_state.update(status="running", model_loaded=False)
+        with mock.patch.object(face_recognition, "embed_local_batch", side_effect=RuntimeError("boom")):
+            with self.assertLogs("services.face_recognition", "ERROR"):
+                face_recognition.warmup_face_model(force_local=True)
+
+    @override_settings(FACE_WARMUP_RETRY_SECONDS=5)
+    def test_failed_warmup_backs_off_exponentially(self):
+        face_recognition._warmup_retry.update(failures=0, at=0.0)
+        with mock.patch.object(face_recognition.time, "monotonic", return_value=100.0):
+            self.fail_warmup()
+            self.assertEqual(face_recognition._warmup_retry["at"], 105.0)
+            self.fail_warmup()
+            self.assertEqual(face_recognition._warmup_retry["at"], 110.0)
+        self.assertEqual(face_recognition._warmup_state["status"], "failed")
+
+    def test_probe_retries_a_failed_warmup_after_the_backoff(self):
+        face_recognition._warmup_state.update(status="failed", model_loaded=False)
+        face_recognition._warmup_retry.update(failures=1, at=100.0)
+
+        with mock.patch.object(face_recognition.threading, "Thread") as thread:
+            with mock.patch.object(face_recognition.time, "monotonic", return_value=99.0):
+                face_recognition.ensure_warmup_started()
+            thread.assert_not_called()
+
+            with mock.patch.object(face_recognition.time, "monotonic", return_value=100.0):
+                face_recognition.ensure_warmup_started()
+            thread.assert_called_once()
+        self.assertEqual(face_recognition._warmup_state["status"], "running")
+
+    def test_no_retry_once_the_model_is_loaded(self):
+        face_recognition._warmup_state.update(status="failed", model_loaded=True)
+        face_recognition._warmup_retry.update(failures=1, at=0.0)
+
+        with mock.patch.object(face_recognition.threading, "Thread") as thread:
+            face_recognition.ensure_warmup_started()
+        thread.assert_not_called()